@@ -13,41 +13,62 @@ Flux fonctionnel :
 
 from __future__ import annotations
 
+import functools
+import hashlib
+import importlib
+import operator
+import os
+import re
+import tempfile
+import threading
+import uuid
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
 import pandas as pd
+import pyarrow as pa
 import streamlit as st
 import altair as alt
-from typing import Dict, Any, Optional, List, Tuple
+from typing import Dict, Any, Optional, List, Tuple, Union
 from datetime import datetime
 
 # Imports des modules avec gestion d'erreur
 try:
-    # Modules de base
+    # Modules de base (nécessaires dès les premières pages)
     import clim_data_loader
     import clim_preprocessing
-    import clim_insurance   # Module pour l'analyse actuarielle
-    import clim_modeling
-    import clim_evaluation
-    import clim_visualization  # Module de visualisation avancée
-    import clim_model_comparison
-    import clim_reporting  # Module de génération de rapports
-    from clim_data_utils import merge_dataframes
-    
-    # Import des composants géospatiaux
-    from clim_geospatial import (
-        GeoProcessor,
-        create_map,
-        run_maps_page,
-        detect_lat_lon_columns,
-        show_risk_map,
-        spatial_join_hazard,
-        calculate_water_proximity,
-        add_climate_scenario
+    from clim_data_utils import (
+        DFRef,
+        as_dataframe,
+        frame_fingerprint,
+        guess_date_format,
+        merge_dataframes,
+        optimize_dtypes,
+        to_datetime_fast,
     )
 except ImportError as e:
     st.error(f"❌ Erreur d'import des modules : {e}")
     st.stop()
 
 
+_import_module = functools.lru_cache(maxsize=None)(importlib.import_module)
+
+
+def _lazy(module_name: str):
+    """Importe un module lourd à la première page qui en a besoin.
+
+    Modélisation, évaluation, assurance et géospatial (geopandas, shapely,
+    pyproj...) ne sont chargés que lorsqu'on ouvre la page correspondante ;
+    les reruns suivants se réduisent à une recherche dans le cache.
+    """
+    try:
+        return _import_module(module_name)
+    except ImportError as e:
+        st.error(f"❌ Erreur d'import des modules : {e}")
+        st.stop()
+
+
 st.set_page_config(
     page_title="Data Tool Climatique",
     layout="wide",
@@ -59,161 +80,245 @@ if 'initialized' not in st.session_state:
     st.session_state['initialized'] = True
 
 
-@st.cache_resource
-def _inject_custom_css() -> None:
-    """Applique le même thème que l'app principale Data Project Tool."""
-
-    st.markdown(
-        """
-        <style>
-
-        /********* HEADER *********/
-        .custom-header {
-            position: fixed;
-            top: 0;
-            left: 0;
-            width: 100%;
-            height: 60px;
-            background-color: #1E3A5F;
-            color: white;
-            display: flex;
-            align-items: center;
-            justify-content: space-between;
-            padding: 0 40px;
-            z-index: 9999;
-            box-shadow: 0px 2px 5px rgba(0,0,0,0.3);
-        }
-        .custom-header .logo { font-size: 22px; font-weight: bold; color: #FFD700; }
-        .custom-header .menu { display: flex; gap: 20px; }
-        .custom-header .menu a { color: white; text-decoration: none; font-weight: 500; font-family: 'Segoe UI', sans-serif; transition: color 0.3s; }
-        .custom-header .menu a:hover { color: #FFD700; }
-
-        .block-container { padding-top: 80px !important; }
-        .stApp { background-color: #1E3A5F; }
-        .block-container, .st-emotion-cache-18e3th9, .st-emotion-cache-1y4p8pa { background-color: transparent !important; }
-
-        /********* TITRES *********/
-        h1, h2, h3, h4 { color: #FFD700; font-family: 'Segoe UI', sans-serif; }
-
-        /********* TEXTE GLOBAL *********/
-        .block-container p,
-        .block-container span,
-        .block-container label,
-        .block-container div:not([data-testid="stFileUploader"]):not(.stSelectbox):not([role="radiogroup"]) {
-            color: #FFFFFF !important;
-            font-family: 'Segoe UI', sans-serif;
-        }
-
-        /********* SIDEBAR *********/
-        [data-testid="stSidebar"] { background-color: #1569C7 !important; color: yellow !important; }
-        [data-testid="stSidebar"] h1, h2, h3, label { color: yellow !important; }
+# Thème CSS (identique à l'app principale Data Project Tool), construit une
+# seule fois à l'import. Les commentaires et espaces superflus sont retirés
+# pour alléger le HTML renvoyé au navigateur à chaque rerun.
+_CSS_BLOCK = re.sub(
+    r"\s+",
+    " ",
+    re.sub(r"/\*.*?\*/", "", """
+    <style>
+
+    /********* HEADER *********/
+    .custom-header {
+        position: fixed;
+        top: 0;
+        left: 0;
+        width: 100%;
+        height: 60px;
+        background-color: #1E3A5F;
+        color: white;
+        display: flex;
+        align-items: center;
+        justify-content: space-between;
+        padding: 0 40px;
+        z-index: 9999;
+        box-shadow: 0px 2px 5px rgba(0,0,0,0.3);
+    }
+    .custom-header .logo { font-size: 22px; font-weight: bold; color: #FFD700; }
+    .custom-header .menu { display: flex; gap: 20px; }
+    .custom-header .menu a { color: white; text-decoration: none; font-weight: 500; font-family: 'Segoe UI', sans-serif; transition: color 0.3s; }
+    .custom-header .menu a:hover { color: #FFD700; }
+
+    .block-container { padding-top: 80px !important; }
+    .stApp { background-color: #1E3A5F; }
+    .block-container, .st-emotion-cache-18e3th9, .st-emotion-cache-1y4p8pa { background-color: transparent !important; }
+
+    /********* TITRES *********/
+    h1, h2, h3, h4 { color: #FFD700; font-family: 'Segoe UI', sans-serif; }
+
+    /********* TEXTE GLOBAL *********/
+    .block-container p,
+    .block-container span,
+    .block-container label,
+    .block-container div:not([data-testid="stFileUploader"]):not(.stSelectbox):not([role="radiogroup"]) {
+        color: #FFFFFF !important;
+        font-family: 'Segoe UI', sans-serif;
+    }
+
+    /********* SIDEBAR *********/
+    [data-testid="stSidebar"] { background-color: #1569C7 !important; color: yellow !important; }
+    [data-testid="stSidebar"] h1, h2, h3, label { color: yellow !important; }
+
+    /********* BOUTONS *********/
+    .stButton>button { background-color: #FFD700; color: #1E3A5F; border-radius: 10px; padding: 10px 20px; border: none; font-weight: bold; }
+    .stButton>button:hover { background-color: #FFA500; color: white; }
+
+    /********* FILE UPLOADER *********/
+    [data-testid="stFileUploader"] {
+        background-color: #FFD700 !important;
+        border-radius: 10px;
+        padding: 10px;
+    }
+
+    [data-testid="stFileUploader"] * {
+        color: #FFFFFF !important;
+        font-weight: 600;
+    }
+
+    [data-testid="stFileUploaderDropzone"] {
+        background-color: #111827 !important;
+        border: 2px dashed #FFD700 !important;
+    }
+
+    /********* RADIO + SELECTBOX *********/
+    div[role="radiogroup"] label {
+        background: #34495E !important;
+        color: yellow !important;
+        padding: 8px 15px;
+        border-radius: 8px;
+        margin: 3px 0;
+        cursor: pointer;
+    }
+
+    div[role="radiogroup"] label:hover {
+        background: #1ABC9C !important;
+    }
+
+    .stSelectbox * {
+        background-color: #34495E !important;
+        color: yellow !important;
+    }
+
+    /********* JSON & CODE *********/
+    [data-testid="stJson"] {
+        background-color: #000000 !important;
+        border-radius: 8px;
+        padding: 10px;
+    }
+
+    [data-testid="stJson"] *,
+    [data-testid="stJson"] div,
+    [data-testid="stJson"] span,
+    [data-testid="stJson"] p {
+        background-color: #000000 !important;
+        color: #FFFFFF !important;
+        font-family: 'Courier New', monospace !important;
+    }
+
+    code, pre {
+        background-color: #000000 !important;
+        color: #FFFFFF !important;
+        border-radius: 5px;
+        padding: 10px !important;
+    }
+
+    /********* DATAFRAMES *********/
+    [data-testid="stDataFrame"] {
+        background-color: #000000 !important;
+    }
+
+    [data-testid="stDataFrame"] * {
+        color: #FFFFFF !important;
+    }
+
+    .stDataFrame table {
+        background-color: #000000 !important;
+        color: #FFFFFF !important;
+    }
+
+    .stDataFrame th {
+        background-color: #1E3A5F !important;
+        color: #FFD700 !important;
+        font-weight: bold;
+    }
+
+    .stDataFrame td {
+        background-color: #000000 !important;
+        color: #FFFFFF !important;
+    }
+
+    /********* EXPANDERS *********/
+    [data-testid="stExpander"] {
+        background-color: #1E3A5F !important;
+        border: 1px solid #FFD700 !important;
+    }
+
+    [data-testid="stExpander"] * {
+        color: #FFFFFF !important;
+    }
+
+    </style>
+    """, flags=re.S),
+).strip()
 
-        /********* BOUTONS *********/
-        .stButton>button { background-color: #FFD700; color: #1E3A5F; border-radius: 10px; padding: 10px 20px; border: none; font-weight: bold; }
-        .stButton>button:hover { background-color: #FFA500; color: white; }
-
-        /********* FILE UPLOADER *********/
-        [data-testid="stFileUploader"] {
-            background-color: #FFD700 !important;
-            border-radius: 10px;
-            padding: 10px;
-        }
 
-        [data-testid="stFileUploader"] * {
-            color: #FFFFFF !important;
-            font-weight: 600;
-        }
-
-        [data-testid="stFileUploaderDropzone"] {
-            background-color: #111827 !important;
-            border: 2px dashed #FFD700 !important;
-        }
-
-        /********* RADIO + SELECTBOX *********/
-        div[role="radiogroup"] label {
-            background: #34495E !important;
-            color: yellow !important;
-            padding: 8px 15px;
-            border-radius: 8px;
-            margin: 3px 0;
-            cursor: pointer;
-        }
-
-        div[role="radiogroup"] label:hover {
-            background: #1ABC9C !important;
-        }
-
-        .stSelectbox * {
-            background-color: #34495E !important;
-            color: yellow !important;
-        }
-
-        /********* JSON & CODE *********/
-        [data-testid="stJson"] {
-            background-color: #000000 !important;
-            border-radius: 8px;
-            padding: 10px;
-        }
+def _inject_custom_css() -> None:
+    """Applique le même thème que l'app principale Data Project Tool."""
 
-        [data-testid="stJson"] *,
-        [data-testid="stJson"] div,
-        [data-testid="stJson"] span,
-        [data-testid="stJson"] p {
-            background-color: #000000 !important;
-            color: #FFFFFF !important;
-            font-family: 'Courier New', monospace !important;
-        }
+    st.markdown(_CSS_BLOCK, unsafe_allow_html=True)
 
-        code, pre {
-            background-color: #000000 !important;
-            color: #FFFFFF !important;
-            border-radius: 5px;
-            padding: 10px !important;
-        }
 
-        /********* DATAFRAMES *********/
-        [data-testid="stDataFrame"] {
-            background-color: #000000 !important;
-        }
+# Copies Parquet des fichiers déjà ingérés (réutilisées d'une session à
+# l'autre), dans le répertoire temporaire du système et plafonnées en taille
+_UPLOAD_CACHE_DIR = Path(tempfile.gettempdir()) / "clim_upload_cache"
+_UPLOAD_CACHE_MAX_BYTES = 512 * 1024 * 1024
 
-        [data-testid="stDataFrame"] * {
-            color: #FFFFFF !important;
-        }
 
-        .stDataFrame table {
-            background-color: #000000 !important;
-            color: #FFFFFF !important;
-        }
-
-        .stDataFrame th {
-            background-color: #1E3A5F !important;
-            color: #FFD700 !important;
-            font-weight: bold;
-        }
-
-        .stDataFrame td {
-            background-color: #000000 !important;
-            color: #FFFFFF !important;
-        }
+def _evict_upload_cache() -> None:
+    """Supprime les copies Parquet les moins récemment utilisées au-delà du plafond."""
+    entries = []
+    for path in _UPLOAD_CACHE_DIR.glob("*.parquet"):
+        try:
+            stat = path.stat()
+        except OSError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= _UPLOAD_CACHE_MAX_BYTES:
+            break
+        try:
+            path.unlink()
+        except OSError:
+            continue
+        total -= size
+
+
+def _parse_upload(
+    raw: bytes,
+    name: str,
+    sep: str = ",",
+    sheet: Optional[str] = None,
+    precision: str = "fp32",
+) -> Optional[pd.DataFrame]:
+    """Parse le contenu d'un fichier uploadé et réduit ses types.
+
+    La lecture passe par ``clim_data_loader.read_tabular_bytes``, mise en
+    cache sur les octets du fichier. En ``precision="fp32"`` les types sont
+    réduits dès le chargement (voir ``clim_data_utils.optimize_dtypes``).
+
+    Le résultat est aussi persisté en Parquet dans un répertoire temporaire :
+    une session ultérieure relit ce fichier colonnaire au lieu de reparser le
+    CSV/Excel. Au-delà de ``_UPLOAD_CACHE_MAX_BYTES``, les copies les moins
+    récemment utilisées sont supprimées.
+    """
+    digest = hashlib.sha1(raw)
+    digest.update(f"|{sep}|{sheet}|{precision}".encode("utf-8"))
+    cache_path = _UPLOAD_CACHE_DIR / f"{digest.hexdigest()}.parquet"
+    if cache_path.exists():
+        try:
+            df = pd.read_parquet(cache_path)
+            cache_path.touch()
+            return df
+        except Exception as exc:  # cache illisible : on reparse le fichier
+            st.warning(f"⚠️ Copie Parquet en cache ignorée : {exc}")
 
-        /********* EXPANDERS *********/
-        [data-testid="stExpander"] {
-            background-color: #1E3A5F !important;
-            border: 1px solid #FFD700 !important;
-        }
+    try:
+        df = clim_data_loader.read_tabular_bytes(raw, name, sep, sheet)
+        if precision == "fp32":
+            df = optimize_dtypes(df, float32=True)
+    except Exception as exc:
+        st.error(f"❌ Erreur lors du chargement du fichier : {exc}")
+        return None
 
-        [data-testid="stExpander"] * {
-            color: #FFFFFF !important;
-        }
+    try:
+        _UPLOAD_CACHE_DIR.mkdir(exist_ok=True)
+        df.to_parquet(cache_path, compression="zstd")
+        _evict_upload_cache()
+    except Exception as exc:  # noms de colonnes non texte, disque plein, etc.
+        st.warning(f"⚠️ Impossible d'écrire la copie Parquet en cache : {exc}")
 
-        </style>
-        """,
-        unsafe_allow_html=True,
-    )
+    return df
 
 
 def main() -> None:
     _inject_custom_css()
+    # Compilation JIT des noyaux numba en arrière-plan, pendant que
+    # l'utilisateur charge ses données et remplit le formulaire
+    if "_numba_warm" not in st.session_state:
+        st.session_state["_numba_warm"] = True
+        threading.Thread(target=clim_preprocessing.warmup_rolling_engine, daemon=True).start()
     # Header HTML fixé en haut, comme pour l'app principale
     st.markdown(
         """
@@ -341,6 +446,115 @@ def page_framing() -> None:
             st.markdown(f"**Contexte :** {framing['context']}")
 
 
+@st.cache_data(show_spinner=False, max_entries=8, ttl=3600, hash_funcs={DFRef: lambda ref: ref.path})
+def _get_merged(sources: Tuple[DFRef, ...]) -> pd.DataFrame:
+    """Fusionne les sources chargées, en cache tant qu'elles ne changent pas.
+
+    La clé ne hache pas le contenu des sources (coûteux) mais le chemin de
+    leur fichier Feather, propre à chaque source : ajouter ou supprimer une
+    source change la clé sans vider le cache des autres sessions. Les
+    fusions devenues inutiles sortent du cache par ``max_entries``/``ttl``.
+    """
+    return merge_dataframes([ref.load() for ref in sources])
+
+
+@st.cache_data(show_spinner=False, max_entries=32, hash_funcs={pd.DataFrame: frame_fingerprint})
+def _meta(df: pd.DataFrame) -> SimpleNamespace:
+    """Métadonnées de ``df`` : ``n``, ``ncols``, ``empty``, ``cols``, ``num``.
+
+    En cache par empreinte du contenu (``frame_fingerprint``) : les frames
+    servies par ``DFRef.load`` ou ``_get_merged`` sont de nouveaux objets à
+    chaque rerun, mais tant que les données ne changent pas, colonnes et
+    dtypes ne sont pas rescannés.
+    """
+    n, ncols = df.shape
+    return SimpleNamespace(
+        n=n,
+        ncols=ncols,
+        empty=n == 0 or ncols == 0,
+        cols=df.columns.tolist(),
+        num=df.select_dtypes(include=["number"]).columns.tolist(),
+    )
+
+
+@st.cache_data(show_spinner=False, max_entries=32, hash_funcs={pd.DataFrame: frame_fingerprint})
+def _lat_lon(df: pd.DataFrame) -> Tuple[Optional[str], Optional[str]]:
+    """Colonnes latitude/longitude de ``df``, en cache comme ``_meta``."""
+    return _lazy("clim_geospatial").detect_lat_lon_columns(df)
+
+
+def _fast_to_dt(series: pd.Series) -> pd.Series:
+    """Convertit une colonne en datetime en réutilisant le format déjà deviné.
+
+    Le format inféré est mémorisé dans ``st.session_state`` par nom de
+    colonne (et première valeur, pour distinguer deux sources homonymes)
+    afin de ne pas refaire l'inférence à chaque rerun.
+    """
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series
+    first = series.first_valid_index()
+    key = (series.name, None if first is None else str(series[first]))
+    formats = st.session_state.setdefault("_dt_formats", {})
+    if key not in formats:
+        formats[key] = guess_date_format(series)
+    return to_datetime_fast(series, fmt=formats[key])
+
+
+@st.cache_data(show_spinner=False, hash_funcs={pd.DataFrame: frame_fingerprint})
+def _run_prep(df: pd.DataFrame, **params: Any) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+    """``basic_climate_preprocessing`` mis en cache sur (empreinte du DataFrame, paramètres)."""
+    return clim_preprocessing.basic_climate_preprocessing(df, **params)
+
+
+def _arrow_preview(df: pd.DataFrame, n: int = 5) -> Union[pa.Table, pd.DataFrame]:
+    """Premières lignes de ``df`` converties en table Arrow pour ``st.dataframe``.
+
+    Streamlit sérialise directement une table Arrow, sans refaire l'inférence
+    des types du DataFrame pandas à chaque affichage. Les colonnes de types
+    mélangés, qu'Arrow refuse, retombent sur l'affichage pandas classique.
+    """
+    head = df.head(n)
+    try:
+        return pa.Table.from_pandas(head)
+    except (pa.ArrowException, ValueError):
+        return head
+
+
+@st.cache_data(show_spinner=False)
+def _line_chart_spec(date_col: str, value_col: str) -> Dict[str, Any]:
+    """Spec Vega-Lite de la série temporelle de l'EDA, sans données.
+
+    La construction et la validation Altair ne sont faites qu'une fois par
+    couple (date, variable) ; les données sont fournies à l'affichage.
+    """
+    spec = (
+        alt.Chart()
+        .mark_line(color="#FFD700", strokeWidth=2)
+        .encode(
+            x=alt.X(
+                date_col, 
+                type="temporal", 
+                title=date_col,
+                axis=alt.Axis(
+                    labelAngle=-45,
+                    labelOverlap=False,
+                    labelLimit=100,
+                    format="%Y-%m-%d"
+                )
+            ),
+            y=alt.Y(value_col, type="quantitative", title=value_col),
+        )
+        .properties(height=300)
+        .configure_view(strokeWidth=0)  # Optimisation
+        .configure_axis(grid=True, gridOpacity=0.3)  # Grille légère pour meilleur rendu
+        .to_dict()
+    )
+    # Retirer le jeu de données vide généré par Altair
+    spec.pop("data", None)
+    spec.pop("datasets", None)
+    return spec
+
+
 def _select_data_source() -> pd.DataFrame:
     """Helper pour sélectionner la source de données à utiliser."""
     try:
@@ -372,17 +586,14 @@ def _select_data_source() -> pd.DataFrame:
         if "prétraitées" in options[0]:
             return df_prep
         elif "Fusionner" in options[0]:
-            # Cache la fusion
-            if "merged_data" not in st.session_state:
-                try:
-                    st.session_state["merged_data"] = merge_dataframes(list(data_sources.values()))
-                except (ValueError, TypeError) as e:
-                    st.error(f"❌ Erreur lors de la fusion des données : {e}")
-                    return None
-            return st.session_state["merged_data"]
+            try:
+                return _get_merged(tuple(data_sources.values()))
+            except (ValueError, TypeError) as e:
+                st.error(f"❌ Erreur lors de la fusion des données : {e}")
+                return None
         else:
             source_label = options[0].replace("Source : ", "")
-            return data_sources[source_label]
+            return data_sources[source_label].load()
     
     # Sinon, proposer un selectbox
     choice = st.selectbox("📂 Choisir la source de données", options, key="data_source_selector")
@@ -390,17 +601,14 @@ def _select_data_source() -> pd.DataFrame:
     if "prétraitées" in choice:
         return df_prep
     elif "Fusionner" in choice:
-        # Cache la fusion
-        if "merged_data" not in st.session_state:
-            try:
-                st.session_state["merged_data"] = merge_dataframes(list(data_sources.values()))
-            except (ValueError, TypeError) as e:
-                st.error(f"❌ Erreur lors de la fusion des données : {e}")
-                return None
-        return st.session_state["merged_data"]
+        try:
+            return _get_merged(tuple(data_sources.values()))
+        except (ValueError, TypeError) as e:
+            st.error(f"❌ Erreur lors de la fusion des données : {e}")
+            return None
     else:
         source_label = choice.replace("Source : ", "")
-        return data_sources[source_label]
+        return data_sources[source_label].load()
 
 
 def page_loading() -> None:
@@ -436,14 +644,28 @@ def page_loading() -> None:
     sep = ","
     sheet = None
     if uploaded is not None:
+        raw = uploaded.getvalue()
         if uploaded.name.lower().endswith(".csv"):
             sep = st.selectbox("Séparateur CSV", [",", ";", "\t"], index=0)
         else:
-            xls = pd.ExcelFile(uploaded)
-            sheet = st.selectbox("Feuille Excel", xls.sheet_names)
+            sheet = st.selectbox("Feuille Excel", clim_data_loader.excel_sheet_names(raw))
+        precision = st.radio(
+            "Précision numérique",
+            ["fp32", "fp64"],
+            horizontal=True,
+            help="fp32 divise par deux la mémoire des colonnes décimales (arrondies à ~7 chiffres "
+                 "significatifs) ; fp64 conserve les décimaux d'origine",
+        )
 
         if st.button("➕ Ajouter cette source"):
-            df = clim_data_loader.load_tabular_file(uploaded, sep=sep, sheet_name=sheet)
+            df = _parse_upload(raw, uploaded.name, sep, sheet, precision=precision)
+            if df is not None:
+                # Seul un pointeur vers un fichier Feather reste en session
+                try:
+                    df = DFRef(df)
+                except (pa.ArrowException, OSError) as exc:
+                    st.error(f"❌ Impossible d'enregistrer la source : {exc}")
+                    df = None
             if df is not None:
                 st.session_state["data_sources"][source_label] = df
                 st.success(f"✅ Source '{source_label}' ajoutée avec succès ({df.shape[0]} lignes × {df.shape[1]} colonnes).")
@@ -455,11 +677,11 @@ def page_loading() -> None:
     if st.session_state["data_sources"]:
         st.markdown("---")
         st.subheader("📋 Sources chargées")
-        for idx, (label, df) in enumerate(st.session_state["data_sources"].items()):
-            st.markdown(f"**📄 {label}** : {df.shape[0]} lignes × {df.shape[1]} colonnes")
+        for idx, (label, ref) in enumerate(st.session_state["data_sources"].items()):
+            st.markdown(f"**📄 {label}** : {ref.shape[0]} lignes × {ref.shape[1]} colonnes")
             col1, col2 = st.columns([4, 1])
             with col1:
-                st.dataframe(df.head(), use_container_width=True)
+                st.dataframe(_arrow_preview(ref.head()), use_container_width=True)
             with col2:
                 if st.button(f"🗑️ Supprimer", key=f"del_source_{idx}"):
                     del st.session_state["data_sources"][label]
@@ -479,55 +701,46 @@ def page_eda() -> None:
         return
 
     st.subheader("Aperçu général")
-    st.write(f"Shape : {df.shape[0]:,} lignes × {df.shape[1]} colonnes")
+    meta = _meta(df)
+    st.write(f"Shape : {meta.n:,} lignes × {meta.ncols} colonnes")
     # Limiter à 10 lignes pour meilleures performances
-    st.dataframe(df.head(10), use_container_width=True, height=300)
+    st.dataframe(_arrow_preview(df, 10), use_container_width=True, height=300)
 
     st.subheader("Série temporelle simple")
-    date_col = st.selectbox("Colonne date", options=["(aucune)"] + df.columns.tolist())
-    num_cols = df.select_dtypes(include=["number"]).columns.tolist()
+    all_cols, num_cols = meta.cols, meta.num
+    date_col = st.selectbox("Colonne date", options=["(aucune)"] + all_cols)
     value_col = st.selectbox("Variable à tracer", options=num_cols) if num_cols else None
 
     if date_col != "(aucune)" and value_col:
         try:
-            tmp = df[[date_col, value_col]].copy()
-            tmp[date_col] = pd.to_datetime(tmp[date_col], errors="coerce")
-            tmp = tmp.dropna(subset=[date_col])
-            tmp = tmp.sort_values(date_col)
-
-            # Si énormément de points, on échantillonne pour ne pas saturer le navigateur
-            max_points = 2000  # Réduit de 5000 à 2000 pour meilleures performances
-            if len(tmp) > max_points:
-                tmp = tmp.iloc[:: int(len(tmp) / max_points) + 1, :]
-
-            chart = (
-                alt.Chart(tmp)
-                .mark_line(color="#FFD700", strokeWidth=2)
-                .encode(
-                    x=alt.X(
-                        date_col, 
-                        type="temporal", 
-                        title=date_col,
-                        axis=alt.Axis(
-                            labelAngle=-45,
-                            labelOverlap=False,
-                            labelLimit=100,
-                            format="%Y-%m-%d"
-                        )
-                    ),
-                    y=alt.Y(value_col, type="quantitative", title=value_col),
-                )
-                .properties(height=300)
-                .configure_view(strokeWidth=0)  # Optimisation
-                .configure_axis(grid=True, gridOpacity=0.3)  # Grille légère pour meilleur rendu
-            )
-
-            st.altair_chart(chart, use_container_width=True)
+            # Si énormément de lignes, on échantillonne AVANT la conversion et le tri
+            # pour ne pas parser des dates inutilement
+            max_rows = 20000
+            stride = max(1, len(df) // max_rows)
+            tmp = df[[date_col, value_col]].iloc[::stride].copy()
+            tmp[date_col] = _fast_to_dt(tmp[date_col])
+            tmp.dropna(subset=[date_col], inplace=True)
+            tmp.sort_values(date_col, inplace=True)
+
+            # Agrégation temporelle côté serveur (moyenne par intervalle de temps) :
+            # le navigateur reçoit au plus max_bins points, quelle que soit la taille des données
+            max_bins = 400
+            if len(tmp) > max_bins:
+                ts = tmp[date_col].to_numpy(dtype="datetime64[ns]").astype("int64")
+                step = (ts[-1] - ts[0]) // max_bins + 1
+                bins = (ts - ts[0]) // step
+                tmp = tmp.groupby(bins, sort=True).agg({date_col: "first", value_col: "mean"})
+
+            # Spec construite une fois par couple de colonnes ; seules les données changent
+            st.vega_lite_chart(tmp, _line_chart_spec(date_col, value_col), use_container_width=True)
         except Exception as exc:  # pragma: no cover - affichage utilisateur
             st.error(f"Impossible de tracer la série temporelle : {exc}")
 
 
+@st.fragment
 def page_preprocessing() -> None:
+    # Fragment : un clic sur un widget ne réexécute que cette page, pas le
+    # routeur ni la sélection/fusion des sources de tout le script.
     st.header("🛠️ Prétraitement Climat")
     
     # Fusionner toutes les sources de données disponibles
@@ -537,32 +750,33 @@ def page_preprocessing() -> None:
         # Fusionner toutes les sources
         dfs = list(data_sources.values())
         if len(dfs) == 1:
-            df = dfs[0]
+            df = dfs[0].load()
         if len(dfs) > 1:
             st.info(f"Fusion de {len(dfs)} sources de données...")
-            # Utiliser la fonction centralisée de fusion
-            df = merge_dataframes(dfs)
-            st.success(f"✅ Données fusionnées : {df.shape[0]:,} lignes × {df.shape[1]} colonnes")
+            # Utiliser la fusion centralisée (mise en cache entre les reruns)
+            df = _get_merged(tuple(dfs))
+            meta = _meta(df)
+            st.success(f"✅ Données fusionnées : {meta.n:,} lignes × {meta.ncols} colonnes")
     else:
-        df = st.session_state.get("clim_data")
+        df = as_dataframe(st.session_state.get("clim_data"))
     
     if df is None or df.empty:
         st.warning("Veuillez d'abord charger des données dans l'onglet 📥 Chargement.")
         return
 
     st.subheader("Paramètres de prétraitement")
-    date_col = st.selectbox("Colonne date", options=["(aucune)"] + df.columns.tolist())
+    meta = _meta(df)
+    all_cols, num_cols = meta.cols, meta.num
+    date_col = st.selectbox("Colonne date", options=["(aucune)"] + all_cols)
     freq = st.selectbox("Fréquence d’agrégation", options=["Aucune", "Jour", "Mois"], index=0)
 
     id_cols: list[str] = []
     st.markdown("**Colonnes d’identifiant (optionnel)**")
     id_cols = st.multiselect(
         "Colonnes d’identifiant (station, zone, etc.)",
-        options=df.columns.tolist(),
+        options=all_cols,
     )
 
-    num_cols = df.select_dtypes(include=["number"]).columns.tolist()
-
     st.markdown("**Features temporelles avancées (optionnel)**")
     use_rolling = st.checkbox("Ajouter des moyennes glissantes (rolling)", value=False)
     rolling_cols = (
@@ -582,28 +796,36 @@ def page_preprocessing() -> None:
     st.markdown("---")
     st.subheader("🌡️ Feature Engineering Climat Avancé")
 
+    # Fenêtres partagées par les cumuls, comptages de seuil et extrêmes
+    windows_str = st.text_input("Fenêtres (jours, séparées par virgule)", value="7,30", key="feature_windows")
+    feature_windows = [int(x.strip()) for x in windows_str.split(",") if x.strip().isdigit()]
+
     st.markdown("**Cumuls glissants (précipitations, degrés-jours, etc.)**")
     use_cumul = st.checkbox("Ajouter des cumuls sur N jours", value=False)
     cumul_cols = []
-    cumul_windows = [7, 30]
+    cumul_windows = feature_windows
     if use_cumul:
         cumul_cols = st.multiselect("Colonnes à cumuler", options=num_cols, key="cumul_cols_select")
-        cumul_windows_str = st.text_input("Fenêtres (jours, séparées par virgule)", value="7,30")
-        cumul_windows = [int(x.strip()) for x in cumul_windows_str.split(",") if x.strip().isdigit()]
 
     st.markdown("**Comptage de jours au-dessus d'un seuil**")
     use_threshold = st.checkbox("Compter les jours > seuil", value=False)
     threshold_cols = []
     thresholds_dict = {}
-    threshold_windows = [7, 30]
+    threshold_windows = feature_windows
     if use_threshold:
         threshold_cols = st.multiselect("Colonnes à analyser", options=num_cols, key="threshold_cols_select")
         if threshold_cols:
             st.markdown("Définir les seuils pour chaque colonne :")
-            for col in threshold_cols:
-                thresholds_dict[col] = st.number_input(f"Seuil pour {col}", value=30.0, key=f"threshold_{col}")
-            threshold_windows_str = st.text_input("Fenêtres (jours, séparées par virgule)", value="7,30", key="threshold_windows")
-            threshold_windows = [int(x.strip()) for x in threshold_windows_str.split(",") if x.strip().isdigit()]
+            # Une seule grille éditable plutôt qu'un widget par colonne
+            thresholds_df = pd.DataFrame({col: [30.0] for col in threshold_cols})
+            edited = st.data_editor(
+                thresholds_df,
+                num_rows="fixed",
+                hide_index=True,
+                key=f"thresh_editor_{'|'.join(threshold_cols)}",
+            )
+            # Cellule vidée par l'utilisateur (None/NaN) : colonne ignorée
+            thresholds_dict = {col: float(val) for col, val in edited.iloc[0].items() if pd.notna(val)}
 
     st.markdown("**Anomalies vs période de référence climatologique**")
     use_ref_anomaly = st.checkbox("Calculer anomalies vs référence", value=False)
@@ -621,16 +843,14 @@ def page_preprocessing() -> None:
     st.markdown("**Extremes glissants (min/max sur fenêtre)**")
     use_extremes = st.checkbox("Ajouter min/max glissants", value=False)
     extreme_cols = []
-    extreme_windows = [7, 30]
+    extreme_windows = feature_windows
     if use_extremes:
         extreme_cols = st.multiselect("Colonnes à analyser", options=num_cols, key="extreme_cols_select")
-        extreme_windows_str = st.text_input("Fenêtres (jours, séparées par virgule)", value="7,30", key="extreme_windows")
-        extreme_windows = [int(x.strip()) for x in extreme_windows_str.split(",") if x.strip().isdigit()]
 
     if st.button("Appliquer le prétraitement"):
         with st.spinner("Prétraitement en cours..."):
             dcol = None if date_col == "(aucune)" else date_col
-            df_prep, info = clim_preprocessing.basic_climate_preprocessing(
+            df_prep, info = _run_prep(
                 df,
                 date_col=dcol,
                 freq=freq,
@@ -678,7 +898,7 @@ def page_preprocessing() -> None:
         st.success("Prétraitement terminé.")
         st.subheader("Aperçu après prétraitement")
         st.write(f"Shape : {df_prep.shape[0]} lignes × {df_prep.shape[1]} colonnes")
-        st.dataframe(df_prep.head(), use_container_width=True)
+        st.dataframe(_arrow_preview(df_prep), use_container_width=True)
 
         if info.get("anomaly_summary"):
             st.subheader("Résumé des anomalies (z-score > 3)")
@@ -695,8 +915,11 @@ def page_preprocessing() -> None:
                 st.dataframe(pd.DataFrame(rows), use_container_width=True)
 
 
+@st.fragment
 def page_modeling() -> None:
+    # Fragment : les nombreux widgets de la page ne relancent qu'elle-même.
     st.header("🤖 Modélisation du Risque Climatique")
+    clim_model_comparison = _lazy("clim_model_comparison")
     
     # Sélection de la source de données
     df = _select_data_source()
@@ -791,7 +1014,10 @@ def page_modeling() -> None:
                     with col1:
                         st.metric("Score Test", f"{result['test_score']:.4f}")
                     with col2:
-                        st.metric("Score Train", f"{result['train_score']:.4f}")
+                        st.metric(
+                            "Score Train",
+                            "—" if result["train_score"] is None else f"{result['train_score']:.4f}",
+                        )
                     with col3:
                         st.metric("Temps", f"{result['training_time']:.2f}s")
 
@@ -847,6 +1073,13 @@ def page_modeling() -> None:
                             "X_test": best_result.get("X_test"),
                         }
                         st.session_state["clim_comparison_results"] = results
+                        st.session_state["clim_best_result"] = best_result
+                        # Découpage réutilisé par l'affinage (mode 3) : pas de nouveau split
+                        st.session_state["clim_split"] = {
+                            "key": (target_col, test_size, handle_imbalance, frame_fingerprint(df)),
+                            "data": (best_result["X_train"], best_result["X_test"],
+                                     best_result["y_train"], best_result["y_test"]),
+                        }
 
     # MODE 3 : Affiner le meilleur modèle
     elif modeling_mode == "Affiner le meilleur modèle":
@@ -856,9 +1089,12 @@ def page_modeling() -> None:
         if "clim_comparison_results" not in st.session_state:
             st.warning("⚠️ Veuillez d'abord comparer des modèles pour identifier le meilleur.")
         else:
-            results = st.session_state["clim_comparison_results"]
-            successful_results = [r for r in results if r["success"]]
-            best_result = successful_results[max(range(len(successful_results)), key=lambda i: successful_results[i]["test_score"])]
+            # Meilleur résultat mémorisé par le mode 2 : pas de re-scan à chaque rerun
+            best_result = st.session_state.get("clim_best_result")
+            if best_result is None:
+                successful_results = (r for r in st.session_state["clim_comparison_results"] if r["success"])
+                best_result = max(successful_results, key=operator.itemgetter("test_score"))
+                st.session_state["clim_best_result"] = best_result
             
             # Afficher le score de base avec contexte
             col1, col2, col3 = st.columns([2, 1, 1])
@@ -885,56 +1121,83 @@ def page_modeling() -> None:
                 default_max_depth = getattr(current_model, 'max_depth', None) or 10
                 default_min_samples_split = getattr(current_model, 'min_samples_split', 2)
                 
+                # Plages explorées par la recherche aléatoire (centrées sur le meilleur modèle)
                 col1, col2, col3 = st.columns(3)
                 with col1:
-                    n_estimators = st.slider("n_estimators", 50, 500, default_n_estimators, 50, key="tune_n_est")
+                    n_estimators = st.slider(
+                        "n_estimators", 50, 500,
+                        (max(50, default_n_estimators // 2), min(500, default_n_estimators * 2)), 50,
+                        key="tune_n_est",
+                    )
                 with col2:
-                    max_depth = st.slider("max_depth", 3, 30, default_max_depth, 1, key="tune_max_depth")
+                    max_depth = st.slider(
+                        "max_depth", 3, 30,
+                        (max(3, default_max_depth - 5), min(30, default_max_depth + 10)), 1,
+                        key="tune_max_depth",
+                    )
                 with col3:
-                    min_samples_split = st.slider("min_samples_split", 2, 20, default_min_samples_split, 1, key="tune_min_split")
+                    min_samples_split = st.slider(
+                        "min_samples_split", 2, 20,
+                        (max(2, default_min_samples_split - 2), min(20, default_min_samples_split + 8)), 1,
+                        key="tune_min_split",
+                    )
+                search_methods = ["Aléatoire"]
+                if clim_model_comparison.HAS_OPTUNA:
+                    search_methods.append("Bayésienne (Optuna TPE)")
+                search_method = st.radio("Méthode de recherche", search_methods, horizontal=True, key="tune_method")
+                use_tpe = search_method.startswith("Bayésienne")
+                n_iter = st.slider(
+                    "Budget (configurations testées)", 5, 100, min(20, 5 * (os.cpu_count() or 1)), 5,
+                    key="tune_n_iter",
+                    help="Nombre de combinaisons évaluées (en parallèle pour la recherche aléatoire)",
+                )
                 
                 if st.button("🚀 Affiner le modèle"):
-                    with st.spinner("Réentraînement avec les nouveaux hyperparamètres..."):
+                    with st.spinner(f"Recherche {'bayésienne' if use_tpe else 'aléatoire'} sur {n_iter} configurations..."):
                         # Récupérer le type de tâche
                         task_type = st.session_state.get("clim_model_info", {}).get("task_type", detected_task)
                         
-                        # Créer le nouveau modèle avec les hyperparamètres affinés
-                        from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
+                        # Étude Optuna réutilisée d'un clic à l'autre tant que le problème
+                        # (données, cible, split, plages) est le même : la recherche reprend où elle s'était arrêtée
+                        data_key = frame_fingerprint(df)
+                        study_key = (target_col, task_type, test_size, handle_imbalance,
+                                     n_estimators, max_depth, min_samples_split, data_key)
+                        saved = st.session_state.get("clim_tuning_study")
+                        study = saved[1] if use_tpe and saved and saved[0] == study_key else None
                         
-                        if task_type == "classification":
-                            tuned_model = RandomForestClassifier(
-                                n_estimators=n_estimators,
-                                max_depth=max_depth,
-                                min_samples_split=min_samples_split,
-                                random_state=42,
-                                n_jobs=-1,
-                                class_weight="balanced" if handle_imbalance else None
-                            )
+                        # Réutiliser le split et le prétraitement déjà appris en mode 2
+                        # si la configuration et les données n'ont pas changé depuis la comparaison
+                        cached_split = st.session_state.get("clim_split")
+                        split_key = (target_col, test_size, handle_imbalance, data_key)
+                        if cached_split and cached_split["key"] == split_key:
+                            split = cached_split["data"]
+                            preprocessor = best_result["pipeline"].named_steps.get("preprocessor")
                         else:
-                            tuned_model = RandomForestRegressor(
-                                n_estimators=n_estimators,
-                                max_depth=max_depth,
-                                min_samples_split=min_samples_split,
-                                random_state=42,
-                                n_jobs=-1
-                            )
+                            split, preprocessor = None, None
                         
-                        # Réentraîner
-                        tuned_results, _ = clim_model_comparison.compare_models(
+                        tuned_result = clim_model_comparison.tune_random_forest(
                             df,
                             target_col=target_col,
                             task=task_type,
+                            param_ranges={
+                                "n_estimators": n_estimators,
+                                "max_depth": max_depth,
+                                "min_samples_split": min_samples_split,
+                            },
+                            n_iter=n_iter,
                             test_size=test_size,
-                            selected_models=["Random Forest (Tuned)"],
-                            fast_mode=False,
-                            use_cv=use_cv,
                             handle_imbalance=handle_imbalance,
+                            method="tpe" if use_tpe else "random",
+                            study=study,
+                            split=split,
+                            preprocessor=preprocessor,
                         )
+                        if tuned_result.get("study") is not None:
+                            st.session_state["clim_tuning_study"] = (study_key, tuned_result["study"])
                         
-                        # Remplacer le modèle par le modèle affiné
-                        if tuned_results and tuned_results[0]["success"]:
-                            tuned_result = tuned_results[0]
-                            
+                        if not tuned_result["success"]:
+                            st.error(f"❌ Échec de l'affinage : {tuned_result.get('error')}")
+                        else:
                             # Comparer avec le modèle de base
                             st.markdown("---")
                             st.subheader("📊 Résultats de l'affinage")
@@ -950,7 +1213,10 @@ def page_modeling() -> None:
                                 st.metric(
                                     "Score Train",
                                     f"{tuned_result['train_score']:.4f}",
-                                    delta=f"{tuned_result['train_score'] - best_result['train_score']:.4f}"
+                                    delta=(
+                                        None if best_result["train_score"] is None
+                                        else f"{tuned_result['train_score'] - best_result['train_score']:.4f}"
+                                    )
                                 )
                             with col3:
                                 st.metric("Temps", f"{tuned_result['training_time']:.2f}s")
@@ -963,6 +1229,7 @@ def page_modeling() -> None:
                                 st.info(f"✓ Légère amélioration : +{improvement:.4f}")
                             else:
                                 st.warning(f"⚠️ Pas d'amélioration : {improvement:.4f}")
+                            st.caption(f"Meilleurs hyperparamètres : {tuned_result['best_params']}")
                             
                             # Sauvegarder le modèle affiné
                             st.session_state["clim_model"] = tuned_result["pipeline"]
@@ -1008,7 +1275,56 @@ def page_evaluation() -> None:
         st.warning("Aucun modèle climat n’a encore été entraîné.")
         return
 
-    clim_evaluation.show_evaluation(info)
+    _lazy("clim_evaluation").show_evaluation(info)
+
+
+@st.cache_data(show_spinner=False, max_entries=8, ttl=3600, hash_funcs={DFRef: lambda ref: ref.path})
+def _merge_map_sources(sources: Tuple[DFRef, ...]) -> pd.DataFrame:
+    """Fusionne les sources pour la page Cartes, sur leurs colonnes communes si possible.
+
+    La clé de cache est le chemin Feather de chaque source, pas leur contenu
+    (voir ``_get_merged``).
+    """
+    dfs = [ref.load() for ref in sources]
+    if len(dfs) == 1:
+        return dfs[0]
+
+    col_sets = [set(d.columns) for d in dfs]
+    n_cols = sum(len(s) for s in col_sets)
+    all_cols = set().union(*col_sets)
+    shared = set.intersection(*col_sets)
+    # Cas fréquent : des clés communes à toutes les sources (lat/lon, date) et
+    # aucune autre colonne partagée. Une seule jointure multi-sources sur
+    # l'index au lieu d'un merge par source.
+    if shared and len(all_cols) == n_cols - (len(dfs) - 1) * len(shared):
+        keys = [c for c in dfs[0].columns if c in shared]
+        indexed = [d.set_index(keys) for d in dfs]
+        if all(d.index.is_unique for d in indexed):
+            return pd.concat(indexed, axis=1, join="outer").reset_index()
+    elif len(all_cols) == n_cols:
+        # Aucune colonne en commun : une seule concaténation horizontale
+        st.info("Fusion par concaténation (pas de colonnes communes détectées)")
+        return pd.concat(dfs, axis=1)
+
+    # Cas mixtes (ou clés dupliquées) : fusion source par source
+    # sur les colonnes communes (lat/lon ou date)
+    df = dfs[0]
+    for i, other_df in enumerate(dfs[1:], 1):
+        # Détection de colonnes communes
+        common_cols = list(set(df.columns) & set(other_df.columns))
+        if common_cols:
+            # Fusionner sur colonnes communes
+            df = pd.merge(df, other_df, on=common_cols, how="outer", suffixes=("", f"_dup{i}"))
+            # Supprimer les colonnes dupliquées
+            df = df.drop(columns=df.filter(like=f"_dup{i}").columns)
+        else:
+            # Concaténer si pas de colonnes communes
+            st.info("Fusion par concaténation (pas de colonnes communes détectées)")
+            other_df_renamed = other_df.rename(
+                columns={col: f"{col}_src{i+1}" for col in other_df.columns if col in df.columns}
+            )
+            df = pd.concat([df, other_df_renamed], axis=1)
+    return df
 
 
 def page_maps() -> None:
@@ -1020,40 +1336,39 @@ def page_maps() -> None:
     if isinstance(df_prep, pd.DataFrame) and not df_prep.empty:
         df = df_prep
     elif data_sources:
-        # Fusionner toutes les sources sur une colonne commune si possible
-        dfs = list(data_sources.values())
-        if len(dfs) == 1:
-            df = dfs[0]
-        else:
-            # Essayer de fusionner sur colonnes communes (lat/lon ou date)
-            df = dfs[0].copy()
-            for i, other_df in enumerate(dfs[1:], 1):
-                # Détection de colonnes communes
-                common_cols = list(set(df.columns) & set(other_df.columns))
-                if common_cols:
-                    # Fusionner sur colonnes communes
-                    df = pd.merge(df, other_df, on=common_cols, how="outer", suffixes=("", f"_dup{i}"))
-                    # Supprimer les colonnes dupliquées
-                    dup_cols = [c for c in df.columns if f"_dup{i}" in c]
-                    if dup_cols:
-                        df = df.drop(columns=dup_cols)
-                else:
-                    # Concaténer si pas de colonnes communes
-                    st.info("Fusion par concaténation (pas de colonnes communes détectées)")
-                    other_df_renamed = other_df.copy()
-                    for col in other_df.columns:
-                        if col in df.columns:
-                            other_df_renamed = other_df_renamed.rename(columns={col: f"{col}_src{i+1}"})
-                    df = pd.concat([df, other_df_renamed], axis=1)
+        # Fusion mise en cache : recalculée seulement si les sources changent
+        df = _merge_map_sources(tuple(data_sources.values()))
     else:
-        df = st.session_state.get("clim_data")
+        df = as_dataframe(st.session_state.get("clim_data"))
 
     if not isinstance(df, pd.DataFrame) or df.empty:
         st.warning("Veuillez d'abord charger des données.")
         return
 
     # Utiliser la nouvelle fonction run_maps_page du module clim_geospatial
-    run_maps_page(df, title="Carte des risques climatiques")
+    _lazy("clim_geospatial").run_maps_page(df, title="Carte des risques climatiques")
+
+
+def _session_key() -> str:
+    """Identifiant propre à la session, à passer aux caches ``st.cache_resource``.
+
+    Ces caches sont communs à tout le processus et leur clé ne hache qu'un
+    échantillon des lignes : l'identifiant de session garantit qu'un objet
+    construit pour un utilisateur n'est jamais servi à un autre.
+    """
+    return st.session_state.setdefault("_session_key", uuid.uuid4().hex)
+
+
+@st.cache_resource(show_spinner=False, max_entries=4, hash_funcs={pd.DataFrame: frame_fingerprint})
+def _build_gdf(session: str, df: pd.DataFrame, lat_col: str, lon_col: str):
+    """GeoDataFrame de points construit une fois par (session, empreinte du DataFrame, lat, lon).
+
+    Changer le type de carte ou la variable affichée ne reconstruit plus les
+    géométries. L'objet est partagé entre les reruns de la session : ne pas
+    le modifier en place.
+    """
+    geo = _lazy("clim_geospatial")
+    return geo.GeoProcessor().create_geodataframe(df, lat_col=lat_col, lon_col=lon_col)
 
 
 def page_spatial_analysis() -> None:
@@ -1067,7 +1382,9 @@ def page_spatial_analysis() -> None:
         return
     
     # Détecter automatiquement les colonnes de coordonnées
-    lat_col, lon_col = detect_lat_lon_columns(df)
+    geo = _lazy("clim_geospatial")
+    meta = _meta(df)
+    lat_col, lon_col = _lat_lon(df)
     
     if not lat_col or not lon_col:
         st.error("Aucune colonne géographique (latitude/longitude) trouvée dans les données.")
@@ -1080,7 +1397,7 @@ def page_spatial_analysis() -> None:
     col1, col2 = st.columns(2)
     with col1:
         # Sélection de la variable à visualiser
-        numeric_cols = df.select_dtypes(include=['float64', 'int64']).columns.tolist()
+        numeric_cols = meta.num
         if not numeric_cols:
             st.warning("Aucune colonne numérique trouvée pour la visualisation.")
             return
@@ -1095,7 +1412,7 @@ def page_spatial_analysis() -> None:
         # Options d'affichage
         map_type = st.selectbox(
             "Type de visualisation",
-            ["Points", "Heatmap", "Cluster"],
+            ["Points", "Heatmap", "Cluster", "Hexagon"],
             index=0
         )
     
@@ -1103,12 +1420,11 @@ def page_spatial_analysis() -> None:
     st.subheader("🗺️ Visualisation Spatiale")
     
     try:
-        # Créer un GeoDataFrame
-        geo_processor = GeoProcessor()
-        gdf = geo_processor.create_geodataframe(df, lat_col=lat_col, lon_col=lon_col)
+        # Créer un GeoDataFrame (une seule fois par jeu de données et couple lat/lon)
+        gdf = _build_gdf(_session_key(), df, lat_col, lon_col)
         
         # Afficher la carte avec le nouveau module
-        st.pydeck_chart(create_map(
+        st.pydeck_chart(geo.create_map(
             gdf,
             value_col=value_col,
             map_type=map_type.lower()
@@ -1137,6 +1453,40 @@ def page_spatial_analysis() -> None:
         st.error(f"Erreur lors de l'analyse spatiale : {str(e)}")
         st.exception(e)
 
+@st.cache_data(show_spinner=False, hash_funcs={pd.DataFrame: frame_fingerprint})
+def _monthly_claims(df: pd.DataFrame) -> pd.DataFrame:
+    """Somme mensuelle des sinistres, colonnes ``date`` (début de mois) et ``sinistre``.
+
+    Un groupby sur les périodes mensuelles évite de trier et réindexer tout
+    le DataFrame comme le ferait ``set_index(...).resample('M')`` ; les mois
+    sans sinistre n'apparaissent pas. ``df['date']`` doit déjà être en
+    datetime (voir ``_ensure_datetime``).
+    """
+    time_series = (
+        df['sinistre']
+        .groupby(df['date'].dt.to_period('M'), sort=True)
+        .sum()
+        .rename_axis('date')
+        .reset_index()
+    )
+    time_series['date'] = time_series['date'].dt.to_timestamp()
+    return time_series
+
+
+@st.cache_resource(show_spinner=False, max_entries=2, hash_funcs={pd.DataFrame: frame_fingerprint})
+def _ensure_datetime(session: str, df: pd.DataFrame) -> pd.DataFrame:
+    """Copie de ``df`` avec la colonne ``date`` convertie une fois par session.
+
+    Le format est deviné sur un échantillon ; à défaut, ``format="mixed"``
+    évite le repli lent de l'inférence ligne par ligne. L'objet est partagé
+    entre les reruns de la session (voir ``_session_key``) : ne pas le
+    modifier en place.
+    """
+    df = df.copy()
+    df['date'] = to_datetime_fast(df['date'], fmt=guess_date_format(df['date']) or "mixed")
+    return df
+
+
 def page_insurance_analysis() -> None:
     """Page d'analyse actuarielle des risques climatiques."""
     st.header("📊 Analyse Actuarielle")
@@ -1155,6 +1505,10 @@ def page_insurance_analysis() -> None:
         st.warning(f"Colonnes manquantes pour l'analyse actuarielle : {', '.join(missing_cols)}")
         return
     
+    # Dates converties une seule fois (bornes du sélecteur et agrégation mensuelle)
+    if 'date' in df.columns:
+        df = _ensure_datetime(_session_key(), df)
+    
     # Configuration de l'analyse
     st.subheader("⚙️ Paramètres de l'analyse")
     
@@ -1164,8 +1518,8 @@ def page_insurance_analysis() -> None:
     with col1:
         # Sélection de la période d'analyse
         if 'date' in df.columns:
-            min_date = pd.to_datetime(df['date']).min()
-            max_date = pd.to_datetime(df['date']).max()
+            min_date = df['date'].min()
+            max_date = df['date'].max()
             date_range = st.date_input(
                 "Période d'analyse",
                 value=(min_date, max_date),
@@ -1186,7 +1540,7 @@ def page_insurance_analysis() -> None:
     
     try:
         # Initialiser l'analyseur d'assurance
-        analyzer = clim_insurance.InsuranceAnalyzer()
+        analyzer = _lazy("clim_insurance").InsuranceAnalyzer()
         
         # Calculer les indicateurs de risque
         if 'Prime Pure' in metrics and 'prime' in df.columns and 'sinistre' in df.columns:
@@ -1211,9 +1565,8 @@ def page_insurance_analysis() -> None:
         if 'date' in df.columns and 'sinistre' in df.columns:
             st.write("### Évolution des sinistres")
             
-            # Grouper par date si nécessaire
-            df['date'] = pd.to_datetime(df['date'])
-            time_series = df.set_index('date')['sinistre'].resample('M').sum().reset_index()
+            # Somme mensuelle (mise en cache par jeu de données)
+            time_series = _monthly_claims(df)
             
             # Créer le graphique avec Altair
             import altair as alt
@@ -1228,15 +1581,27 @@ def page_insurance_analysis() -> None:
             )
             st.altair_chart(chart, use_container_width=True)
         
-        # Distribution des coûts
+        # Distribution des coûts (valeurs numériques finies uniquement :
+        # texte, NaN et ±inf sont écartés)
+        vals = np.empty(0)
         if 'cout' in df.columns:
+            vals = pd.to_numeric(df['cout'], errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+            vals = vals[np.isfinite(vals)]
+        if vals.size:
             st.write("### Distribution des coûts")
             
-            # Créer l'histogramme avec Altair
-            hist = alt.Chart(df).mark_bar().encode(
-                alt.X("cout:Q", bin=True, title="Coût"),
-                y='count()',
-                tooltip=['count()', 'cout:Q']
+            # Histogramme calculé côté serveur : le navigateur ne reçoit que les classes
+            counts, edges = np.histogram(vals, bins=50)
+            hist_df = pd.DataFrame({
+                'cout_min': edges[:-1],
+                'cout_max': edges[1:],
+                'count': counts,
+            })
+            hist = alt.Chart(hist_df).mark_bar().encode(
+                x=alt.X('cout_min:Q', title="Coût"),
+                x2='cout_max:Q',
+                y=alt.Y('count:Q', title="Nombre"),
+                tooltip=['cout_min:Q', 'cout_max:Q', 'count:Q']
             ).properties(
                 width=800,
                 height=400
@@ -1264,10 +1629,10 @@ def page_reporting() -> None:
     
     # Récupérer les données (première source disponible ou source 'Climat')
     if 'Climat' in st.session_state['data_sources']:
-        df = st.session_state['data_sources']['Climat']
+        df = as_dataframe(st.session_state['data_sources']['Climat'])
     else:
         # Prendre la première source disponible
-        df = next(iter(st.session_state['data_sources'].values()))
+        df = as_dataframe(next(iter(st.session_state['data_sources'].values())))
     
     # Stocker les données dans st.session_state pour une utilisation ultérieure
     st.session_state['df'] = df
@@ -6,12 +6,90 @@ contenant des données climatiques, d’exposition ou d’événements.
 
 from __future__ import annotations
 
+import io
 from typing import Optional
 
 import pandas as pd
+import streamlit as st
 
+from clim_data_utils import optimize_dtypes
 
-def load_tabular_file(uploaded_file, sep: str = ",", sheet_name: Optional[str] = None) -> Optional[pd.DataFrame]:
+
+def _read_csv_bytes(raw: bytes, sep: str) -> pd.DataFrame:
+    """Lit un CSV avec le moteur pyarrow (multi-thread), repli sur le moteur C.
+
+    Les colonnes restent en types numpy (pas de ``dtype_backend="pyarrow"``) :
+    la réduction des types, numba et scikit-learn en aval attendent des
+    tableaux numpy, et les colonnes texte sont déjà stockées en Arrow par
+    pandas >= 3.
+    """
+    try:
+        return pd.read_csv(io.BytesIO(raw), sep=sep, engine="pyarrow")
+    except ValueError:  # ArrowInvalid (fichier mal formé), option non gérée par le moteur pyarrow
+        return pd.read_csv(io.BytesIO(raw), sep=sep)
+
+
+def _excel_file(raw: bytes) -> pd.ExcelFile:
+    """Ouvre un classeur Excel avec calamine (lecteur Rust, pandas >= 2.2).
+
+    Repli sur le moteur par défaut de pandas si python-calamine est absent :
+    openpyxl (ouvert en lecture seule par pandas) pour ``.xlsx``, xlrd pour
+    ``.xls``.
+    """
+    try:
+        return pd.ExcelFile(io.BytesIO(raw), engine="calamine")
+    except (ImportError, ValueError):  # python-calamine absent ou pandas trop ancien
+        return pd.ExcelFile(io.BytesIO(raw))
+
+
+def _read_excel_bytes(raw: bytes, sheet: Optional[str]) -> pd.DataFrame:
+    """Lit une feuille d’un classeur Excel (voir ``_excel_file`` pour le moteur)."""
+    with _excel_file(raw) as book:
+        return book.parse(sheet_name=sheet)
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def excel_sheet_names(raw: bytes) -> list[str]:
+    """Liste les feuilles d’un classeur Excel (mise en cache sur ses octets)."""
+    with _excel_file(raw) as book:
+        return book.sheet_names
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def read_tabular_bytes(data: bytes, name: str, sep: str = ",", sheet_name: Optional[str] = None) -> pd.DataFrame:
+    """Parse le contenu brut d’un fichier CSV ou Excel, mis en cache sur ses octets.
+
+    Streamlit réexécute le script à chaque interaction : la clé de cache
+    (octets + nom + séparateur + feuille) évite de reparser un fichier déjà lu.
+    Les erreurs de lecture sont propagées à l’appelant.
+
+    Paramètres
+    ----------
+    data : bytes
+        Contenu du fichier (``uploaded_file.getvalue()``).
+    name : str
+        Nom du fichier, utilisé pour détecter le format.
+    sep : str
+        Séparateur pour les fichiers CSV.
+    sheet_name : str, optional
+        Nom de la feuille pour les fichiers Excel.
+    """
+
+    name = name.lower()
+    if name.endswith(".csv"):
+        return _read_csv_bytes(data, sep)
+    if name.endswith((".xls", ".xlsx")):
+        return _read_excel_bytes(data, sheet_name)
+    raise ValueError("Format de fichier non supporté (attendu: CSV, XLS, XLSX)")
+
+
+def load_tabular_file(
+    uploaded_file,
+    sep: str = ",",
+    sheet_name: Optional[str] = None,
+    downcast: bool = False,
+    precision: str = "fp64",
+) -> Optional[pd.DataFrame]:
     """Charge un fichier CSV ou Excel uploadé par l’utilisateur.
 
     Paramètres
@@ -21,23 +99,28 @@ def load_tabular_file(uploaded_file, sep: str = ",", sheet_name: Optional[str] =
         Séparateur pour les fichiers CSV.
     sheet_name : str, optional
         Nom de la feuille pour les fichiers Excel.
+    downcast : bool
+        Si True, réduit les types après lecture sans perte de valeurs (voir
+        ``clim_data_utils.optimize_dtypes``) : entiers 64 bits -> 32 bits,
+        décimaux exactement représentables -> float32. Moins d’octets par
+        valeur : fusions, agrégations et prétraitements en aval parcourent
+        moins de mémoire.
+    precision : {"fp64", "fp32"}
+        ``"fp32"`` réduit les types (implique ``downcast``) et passe tous les
+        décimaux en float32 : mémoire divisée par deux, valeurs arrondies à
+        ~7 chiffres significatifs.
     """
 
     if uploaded_file is None:
         return None
 
-    name = uploaded_file.name.lower()
-
     try:
-        if name.endswith(".csv"):
-            df = pd.read_csv(uploaded_file, sep=sep)
-        elif name.endswith((".xls", ".xlsx")):
-            df = pd.read_excel(uploaded_file, sheet_name=sheet_name)
-        else:
-            raise ValueError("Format de fichier non supporté (attendu: CSV, XLS, XLSX)")
+        df = read_tabular_bytes(uploaded_file.getvalue(), uploaded_file.name, sep, sheet_name)
     except Exception as exc:  # pragma: no cover - géré au niveau de l’app
         # On laisse l’app Streamlit gérer l’affichage de l’erreur.
         print(f"Erreur lors du chargement du fichier climat : {exc}")
         return None
 
+    if downcast or precision == "fp32":
+        df = optimize_dtypes(df, float32=precision == "fp32")
     return df
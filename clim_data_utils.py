@@ -6,10 +6,33 @@ de données pour éviter la duplication.
 
 from __future__ import annotations
 
+import functools
+import os
+import re
+import tempfile
+import threading
+import warnings
+import weakref
+from collections import OrderedDict
+from typing import Optional
+
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+try:  # pandas >= 2.2
+    from pandas.tseries.api import guess_datetime_format
+except ImportError:  # pragma: no cover - anciennes versions de pandas
+    from pandas.core.tools.datetimes import guess_datetime_format
+
+
+_NON_IDENTIFIER_RE = re.compile(r'[^a-z0-9_]')
+_SPACE_TO_UNDERSCORE = str.maketrans({' ': '_'})
 
 
-def merge_dataframes(dfs: list[pd.DataFrame], how: str = "outer") -> pd.DataFrame:
+def merge_dataframes(dfs: list[pd.DataFrame], how: str = "outer",
+                     reduce_memory: bool = False) -> pd.DataFrame:
     """Fusionne intelligemment plusieurs DataFrames.
     
     Stratégie :
@@ -22,6 +45,8 @@ def merge_dataframes(dfs: list[pd.DataFrame], how: str = "outer") -> pd.DataFram
         Liste de DataFrames à fusionner
     how : str, default="outer"
         Type de merge ('inner', 'outer', 'left', 'right')
+    reduce_memory : bool, default=False
+        Si True, réduit les types du résultat (voir ``optimize_dtypes``)
         
     Returns
     -------
@@ -43,7 +68,6 @@ def merge_dataframes(dfs: list[pd.DataFrame], how: str = "outer") -> pd.DataFram
         if not isinstance(df, pd.DataFrame):
             raise TypeError(f"L'élément {i} n'est pas un DataFrame (type: {type(df)})")
         if df.empty:
-            import warnings
             warnings.warn(f"Le DataFrame {i} est vide et sera ignoré")
     
     # Filtrer les DataFrames vides
@@ -52,34 +76,109 @@ def merge_dataframes(dfs: list[pd.DataFrame], how: str = "outer") -> pd.DataFram
     if not dfs:
         raise ValueError("Tous les DataFrames sont vides")
     
+    merged = _merge_frames(dfs, how)
+    return optimize_dtypes(merged) if reduce_memory else merged
+
+
+def _merge_frames(dfs: list[pd.DataFrame], how: str) -> pd.DataFrame:
+    """Fusionne des DataFrames non vides déjà validés (voir ``merge_dataframes``)."""
     if len(dfs) == 1:
         return dfs[0].copy()
     
-    df = dfs[0].copy()
+    # Cas courants traités en une seule opération plutôt que pas à pas
+    # (chaque étape recopiait le DataFrame accumulé)
+    col_sets = [set(d.columns) for d in dfs]
+    n_cols = sum(len(s) for s in col_sets)
+    all_cols = set().union(*col_sets)
+    if len(all_cols) == n_cols:
+        # Aucune colonne partagée : une seule concaténation horizontale
+        return pd.concat(dfs, axis=1, sort=False)
+    common = set.intersection(*col_sets)
+    if common and len(all_cols) == n_cols - (len(dfs) - 1) * len(common):
+        # Seules les colonnes partagées par tous se recoupent : même résultat
+        # que la boucle, qui fusionnerait à chaque étape sur ces colonnes
+        keys = [c for c in dfs[0].columns if c in common]
+        dfs = _align_key_dtypes(dfs, keys)
+        return functools.reduce(lambda left, right: pd.merge(left, right, on=keys, how=how), dfs)
+    
+    df = dfs[0]
+    # Blocs sans colonne commune en attente : concaténés en une seule fois,
+    # juste avant la prochaine fusion ou en fin de boucle
+    pending: list[pd.DataFrame] = []
+    columns = set(df.columns)
     
     for i, other_df in enumerate(dfs[1:], 1):
-        common_cols = list(set(df.columns) & set(other_df.columns))
+        common_cols = list(columns & set(other_df.columns))
         
         if common_cols:
+            if pending:
+                df = pd.concat([df, *pending], axis=1, sort=False)
+                pending = []
             # Merge sur colonnes communes
+            df, other_df = _align_key_dtypes([df, other_df], common_cols)
             df = pd.merge(df, other_df, on=common_cols, how=how, suffixes=("", f"_dup{i}"))
             # Supprimer les colonnes dupliquées
             dup_cols = [c for c in df.columns if f"_dup{i}" in c]
             if dup_cols:
                 df = df.drop(columns=dup_cols)
+            columns = set(df.columns)
         else:
-            # Concaténation avec renommage des conflits
-            conflicting_cols = [col for col in other_df.columns if col in df.columns]
-            if conflicting_cols:
-                rename_dict = {col: f"{col}_src{i+1}" for col in conflicting_cols}
-                other_df_renamed = other_df.rename(columns=rename_dict)
-            else:
-                other_df_renamed = other_df
-            df = pd.concat([df, other_df_renamed], axis=1)
+            # Aucune colonne commune : concaténation horizontale différée
+            pending.append(other_df)
+            columns.update(other_df.columns)
     
+    if pending:
+        df = pd.concat([df, *pending], axis=1, sort=False)
     return df
 
 
+def _align_key_dtypes(frames: list[pd.DataFrame], keys: list[str],
+                      max_unique_ratio: float = 0.1) -> list[pd.DataFrame]:
+    """Donne le même type aux colonnes de jointure de tous les DataFrames.
+    
+    Sans cela, pandas convertit les clés à chaque ``merge`` (int64 contre
+    float64, category contre object...) et retombe sur un hachage d'objets
+    Python. Règles appliquées :
+    
+    - clés numériques de types différents -> type commun (``np.result_type``)
+    - clés texte ou catégorielles peu variées (moins de ``max_unique_ratio``
+      de valeurs uniques) -> même ``CategoricalDtype`` pour tous, la jointure
+      se fait alors sur les codes entiers
+    
+    Parameters
+    ----------
+    frames : list[pd.DataFrame]
+        DataFrames à fusionner
+    keys : list[str]
+        Colonnes de jointure, présentes dans tous les DataFrames
+    max_unique_ratio : float, default=0.1
+        Proportion maximale de valeurs uniques pour passer une clé texte en category
+        
+    Returns
+    -------
+    list[pd.DataFrame]
+        DataFrames aux clés alignées (les autres colonnes sont inchangées)
+    """
+    casts: dict[str, object] = {}
+    for key in keys:
+        dtypes = [f[key].dtype for f in frames]
+        if all(d == dtypes[0] for d in dtypes[1:]) and not isinstance(dtypes[0], pd.CategoricalDtype):
+            continue
+        if all(pd.api.types.is_numeric_dtype(d) and not pd.api.types.is_bool_dtype(d) for d in dtypes):
+            try:
+                casts[key] = np.result_type(*dtypes)
+            except TypeError:  # types étendus (Int64, Float64...) : laissés à pandas
+                pass
+        elif all(d.kind == "O" for d in dtypes):
+            n_rows = sum(len(f) for f in frames)
+            categories = pd.unique(pd.concat([f[key] for f in frames], ignore_index=True).dropna())
+            if n_rows and len(categories) / n_rows < max_unique_ratio:
+                casts[key] = pd.CategoricalDtype(categories)
+    if not casts:
+        return frames
+    return [f.astype({k: casts[k] for k in casts}) for f in frames]
+
+
 def clean_column_names(df: pd.DataFrame) -> pd.DataFrame:
     """Nettoie les noms de colonnes d'un DataFrame.
     
@@ -97,26 +196,31 @@ def clean_column_names(df: pd.DataFrame) -> pd.DataFrame:
     pd.DataFrame
         DataFrame avec noms de colonnes nettoyés
     """
-    df = df.copy()
-    df.columns = (
-        df.columns
-        .str.strip()
-        .str.lower()
-        .str.replace(' ', '_')
-        .str.replace('[^a-z0-9_]', '', regex=True)
-    )
-    return df
+    # Une seule passe Python sur les noms ; set_axis renvoie un nouveau
+    # DataFrame sans recopier les données (copy-on-write)
+    new_columns = [
+        _NON_IDENTIFIER_RE.sub('', str(col).strip().lower().translate(_SPACE_TO_UNDERSCORE))
+        for col in df.columns
+    ]
+    return df.set_axis(new_columns, axis=1)
 
 
-def detect_date_columns(df: pd.DataFrame, threshold: float = 0.8) -> list[str]:
+def detect_date_columns(df: pd.DataFrame, threshold: float = 0.8,
+                        sample_size: int = 500) -> list[str]:
     """Détecte automatiquement les colonnes de dates.
     
+    Les colonnes numériques et booléennes sont ignorées. Les autres sont
+    d'abord testées sur un échantillon de valeurs non nulles ; seule une
+    colonne dont l'échantillon passe le seuil est convertie en entier.
+    
     Parameters
     ----------
     df : pd.DataFrame
         DataFrame à analyser
     threshold : float, default=0.8
         Seuil de conversion réussie pour considérer une colonne comme date
+    sample_size : int, default=500
+        Nombre de valeurs non nulles testées avant la conversion complète
         
     Returns
     -------
@@ -124,16 +228,31 @@ def detect_date_columns(df: pd.DataFrame, threshold: float = 0.8) -> list[str]:
         Liste des noms de colonnes détectées comme dates
     """
     date_cols = []
+    n_rows = len(df)
+    if n_rows == 0:
+        return date_cols
     
     for col in df.columns:
-        if df[col].dtype == 'datetime64[ns]':
+        series = df[col]
+        if pd.api.types.is_datetime64_any_dtype(series):
             date_cols.append(col)
             continue
+        if pd.api.types.is_numeric_dtype(series) or pd.api.types.is_bool_dtype(series):
+            continue
         
-        # Essayer de convertir en date
         try:
-            converted = pd.to_datetime(df[col], errors='coerce')
-            success_rate = converted.notna().sum() / len(df)
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore", UserWarning)
+                # Sondage sur un échantillon avant de parser toute la colonne
+                sample = series.dropna().head(sample_size)
+                if sample.empty:
+                    continue
+                sample_rate = pd.to_datetime(sample, errors='coerce', format='mixed').notna().mean()
+                if sample_rate < threshold:
+                    continue
+                # Format unique si l'échantillon en a un, sinon inférence ligne à ligne
+                converted = to_datetime_fast(series, fmt=guess_date_format(sample, sample_size) or 'mixed')
+            success_rate = converted.notna().sum() / n_rows
             if success_rate >= threshold:
                 date_cols.append(col)
         except Exception:
@@ -142,6 +261,76 @@ def detect_date_columns(df: pd.DataFrame, threshold: float = 0.8) -> list[str]:
     return date_cols
 
 
+def guess_date_format(
+    series: pd.Series, sample_size: int = 20, dayfirst: bool = False
+) -> Optional[str]:
+    """Devine le format strftime d'une colonne de dates texte.
+
+    Le format est inféré sur la première valeur non nulle puis validé sur un
+    petit échantillon. S'il ne convient pas à tout l'échantillon (formats
+    mélangés), on retourne ``"ISO8601"`` quand toutes les valeurs sont des
+    dates ISO 8601 (précisions différentes : analyseur C de pandas), sinon
+    None pour laisser pandas inférer ligne à ligne.
+    
+    Parameters
+    ----------
+    series : pd.Series
+        Colonne à analyser
+    sample_size : int, default=20
+        Nombre de valeurs non nulles utilisées pour la validation
+    dayfirst : bool, default=False
+        Lire les dates ambiguës jour en premier (JJ/MM/AAAA) ; sans effet
+        sur les dates commençant par l'année (ISO 8601)
+        
+    Returns
+    -------
+    Optional[str]
+        Format détecté (ou ``"ISO8601"``), ou None
+    """
+    sample = series.dropna().head(sample_size).astype(str)
+    if sample.empty:
+        return None
+    fmt = guess_datetime_format(sample.iloc[0], dayfirst=dayfirst)
+    if dayfirst and fmt is not None and fmt.startswith("%Y"):
+        # Année en tête : toujours année-mois-jour, comme pandas en ISO 8601
+        fmt = guess_datetime_format(sample.iloc[0])
+    for candidate in (fmt, "ISO8601"):
+        if candidate is None:
+            continue
+        try:
+            if not pd.to_datetime(sample, format=candidate, errors="coerce").isna().any():
+                return candidate
+        except (ValueError, TypeError):  # fuseaux horaires mélangés
+            pass
+    return None
+
+
+def to_datetime_fast(series: pd.Series, fmt: Optional[str] = None) -> pd.Series:
+    """Convertit une colonne en datetime avec un format explicite.
+
+    Évite le repli lent de pandas (inférence valeur par valeur) en passant
+    un format deviné une seule fois, et active le cache de conversion pour
+    les dates répétées. Les valeurs non convertibles deviennent NaT.
+    
+    Parameters
+    ----------
+    series : pd.Series
+        Colonne à convertir
+    fmt : str, optional
+        Format strftime ; deviné avec ``guess_date_format`` si absent
+        
+    Returns
+    -------
+    pd.Series
+        Colonne au format datetime
+    """
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series
+    if fmt is None:
+        fmt = guess_date_format(series)
+    return pd.to_datetime(series, format=fmt, errors="coerce", cache=True)
+
+
 def get_numeric_columns(df: pd.DataFrame, exclude: list[str] = None) -> list[str]:
     """Retourne les colonnes numériques d'un DataFrame.
     
@@ -180,7 +369,9 @@ def get_categorical_columns(df: pd.DataFrame, exclude: list[str] = None) -> list
     list[str]
         Liste des colonnes catégorielles
     """
-    cat_cols = df.select_dtypes(include=["object", "category"]).columns.tolist()
+    # "string" : colonnes texte de pandas 3 (StringDtype), sans passer par
+    # le repli déprécié de select_dtypes(object)
+    cat_cols = df.select_dtypes(include=["object", "category", "string"]).columns.tolist()
     
     if exclude:
         cat_cols = [col for col in cat_cols if col not in exclude]
@@ -191,7 +382,8 @@ def get_categorical_columns(df: pd.DataFrame, exclude: list[str] = None) -> list
 def remove_duplicate_columns(df: pd.DataFrame) -> pd.DataFrame:
     """Supprime les colonnes dupliquées d'un DataFrame.
     
-    Garde la première occurrence de chaque colonne unique.
+    Garde la première occurrence de chaque colonne unique. Si les noms sont
+    déjà uniques (cas courant), ``df`` est retourné tel quel, sans copie.
     
     Parameters
     ----------
@@ -203,6 +395,9 @@ def remove_duplicate_columns(df: pd.DataFrame) -> pd.DataFrame:
     pd.DataFrame
         DataFrame sans colonnes dupliquées
     """
+    # is_unique est mis en cache par l'Index : pas de masque ni de copie inutiles
+    if df.columns.is_unique:
+        return df
     return df.loc[:, ~df.columns.duplicated()]
 
 
@@ -219,12 +414,239 @@ def get_memory_usage(df: pd.DataFrame) -> dict[str, float]:
     dict[str, float]
         Dictionnaire avec 'total_mb', 'per_column_mb'
     """
-    total_bytes = df.memory_usage(deep=True).sum()
-    total_mb = total_bytes / 1024 / 1024
-    
     per_column = df.memory_usage(deep=True) / 1024 / 1024
     
     return {
-        'total_mb': total_mb,
+        'total_mb': per_column.sum(),
         'per_column_mb': per_column.to_dict()
     }
+
+
+def _optimize_column(s: pd.Series, categorical: bool, float32: bool) -> pd.Series:
+    """Retourne la colonne dans le type le plus compact qui préserve ses valeurs."""
+    if s.dtype == "float64":
+        values = s.to_numpy()
+        if float32:
+            # Arrondi à ~7 chiffres significatifs accepté, mais pas de
+            # débordement vers inf
+            finite = np.abs(values[np.isfinite(values)])
+            if finite.size == 0 or finite.max() <= np.finfo(np.float32).max:
+                return pd.Series(values.astype(np.float32), index=s.index, name=s.name)
+            return s
+        with np.errstate(over="ignore"):
+            narrowed = values.astype(np.float32)
+        # float32 seulement si l'aller-retour ne change aucune valeur
+        # (plage et précision) : identifiants, montants ou coordonnées restent en float64
+        if np.array_equal(values, narrowed.astype(np.float64), equal_nan=True):
+            return pd.Series(narrowed, index=s.index, name=s.name)
+        return s
+    if isinstance(s.dtype, np.dtype) and s.dtype.kind in "iu" and s.dtype.itemsize > 4:
+        # Jamais en dessous de 32 bits : en int8/int16 les sommes et produits
+        # débordent silencieusement
+        target = np.int32 if s.dtype.kind == "i" else np.uint32
+        info = np.iinfo(target)
+        if s.empty or (info.min <= s.min() and s.max() <= info.max):
+            return s.astype(target)
+        return s
+    if categorical and not isinstance(s.dtype, pd.CategoricalDtype):
+        return s.astype("category")
+    return s
+
+
+def optimize_dtypes(df: pd.DataFrame,
+                    categorical_columns: Optional[list[str]] = None,
+                    float32: bool = False) -> pd.DataFrame:
+    """Réduit l'empreinte mémoire d'un DataFrame.
+    
+    - float64 -> float32 quand toutes les valeurs y sont représentables
+      exactement (ou dès que la plage le permet si ``float32=True``)
+    - entiers 64 bits -> 32 bits quand les valeurs y tiennent
+    - colonnes de ``categorical_columns`` -> category
+    
+    Parameters
+    ----------
+    df : pd.DataFrame
+        DataFrame à optimiser
+    categorical_columns : list[str], optional
+        Colonnes à convertir en ``category`` ; aucune par défaut (dates au
+        format texte ou cibles doivent garder leur type avant prétraitement)
+    float32 : bool
+        Si True, convertit aussi les décimaux non représentables exactement
+        (perte de précision au-delà de ~7 chiffres significatifs)
+        
+    Returns
+    -------
+    pd.DataFrame
+        Nouveau DataFrame aux types réduits (mêmes colonnes, même index)
+    """
+    if df.shape[1] == 0:
+        return df.copy()
+    categorical = set(categorical_columns or ())
+    optimized = [
+        _optimize_column(df.iloc[:, i], df.columns[i] in categorical, float32)
+        for i in range(df.shape[1])
+    ]
+    result = pd.concat(optimized, axis=1)
+    result.columns = df.columns
+    return result
+
+
+# DataFrames tirés des fichiers Feather, par chemin, du plus ancien au plus
+# récemment utilisé (partagé par toutes les sessions, borné à _LOADED_MAX)
+_LOADED_MAX = 4
+_loaded_frames: OrderedDict[str, pd.DataFrame] = OrderedDict()
+_loaded_lock = threading.Lock()
+
+
+class DFRef:
+    """Référence légère vers un DataFrame stocké sur disque au format Feather.
+
+    Permet de garder dans ``st.session_state`` un simple pointeur plutôt que
+    le DataFrame complet : seuls le chemin, la forme et les noms de colonnes
+    sont attachés à la référence. Le DataFrame chargé est conservé dans un
+    cache LRU du module, indexé par chemin et limité aux ``_LOADED_MAX``
+    sources les plus récemment lues : les reruns réutilisent le même objet
+    sans relire le fichier, et la mémoire occupée reste bornée quel que soit
+    le nombre de sources en session (une source évincée est relue au
+    prochain accès). Le fichier et l'entrée du cache sont supprimés quand la
+    référence est collectée.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        DataFrame à écrire sur disque (l'index n'est pas conservé)
+    directory : str, optional
+        Répertoire des fichiers Feather (répertoire temporaire par défaut)
+    """
+
+    def __init__(self, df: pd.DataFrame, directory: Optional[str] = None):
+        fd, self.path = tempfile.mkstemp(suffix=".feather", dir=directory)
+        os.close(fd)
+        frame = df.reset_index(drop=True)
+        # Sans compression : la lecture peut alors mapper le fichier en mémoire
+        try:
+            frame.to_feather(self.path, compression="uncompressed")
+        except pa.ArrowException:
+            # Colonnes texte de types mélangés (fréquentes dans les feuilles
+            # Excel) refusées par Arrow : écrites en texte
+            _arrow_compatible(frame).to_feather(self.path, compression="uncompressed")
+        self.shape = df.shape
+        self.columns = df.columns.tolist()
+        weakref.finalize(self, _release, self.path)
+
+    @property
+    def table(self) -> pa.Table:
+        """Table Arrow mappée en mémoire (ouverture sans lecture des données)."""
+        return feather.read_table(self.path, memory_map=True)
+
+    def load(self, columns: Optional[list[str]] = None) -> pd.DataFrame:
+        """DataFrame complet (ou sous-ensemble de colonnes), servi par le cache LRU.
+
+        Le même objet est renvoyé tant que la source reste dans le cache :
+        ne pas le modifier en place. Si le DataFrame complet n'est pas en
+        cache, un sous-ensemble de colonnes est lu seul depuis le fichier.
+        """
+        with _loaded_lock:
+            frame = _loaded_frames.get(self.path)
+            if frame is not None:
+                _loaded_frames.move_to_end(self.path)
+        if frame is None:
+            if columns is not None:
+                return feather.read_table(self.path, columns=columns, memory_map=True).to_pandas()
+            frame = feather.read_table(self.path, memory_map=True).to_pandas()
+            with _loaded_lock:
+                _loaded_frames[self.path] = frame
+                while len(_loaded_frames) > _LOADED_MAX:
+                    _loaded_frames.popitem(last=False)
+        return frame if columns is None else frame[columns]
+
+    def head(self, n: int = 5) -> pd.DataFrame:
+        """Premières lignes du DataFrame, sans matérialiser le reste."""
+        return self.table.slice(0, n).to_pandas()
+
+    def __repr__(self) -> str:
+        return f"DFRef({self.shape[0]} lignes × {self.shape[1]} colonnes, {self.path!r})"
+
+
+def _arrow_compatible(df: pd.DataFrame) -> pd.DataFrame:
+    """Copie de ``df`` où les colonnes objet refusées par Arrow sont converties en texte.
+
+    Les valeurs manquantes sont conservées ; les autres colonnes sont
+    inchangées.
+    """
+    df = df.copy()
+    for i in range(df.shape[1]):
+        s = df.iloc[:, i]
+        if s.dtype != object:
+            continue
+        try:
+            pa.array(s, from_pandas=True)
+        except pa.ArrowException:
+            df.isetitem(i, s.where(s.isna(), s.astype(str)))
+    return df
+
+
+def _release(path: str) -> None:
+    """Oublie le DataFrame chargé depuis ``path`` et supprime le fichier."""
+    with _loaded_lock:
+        _loaded_frames.pop(path, None)
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def as_dataframe(obj) -> Optional[pd.DataFrame]:
+    """Retourne le DataFrame désigné par ``obj`` (``DFRef`` chargée ou DataFrame tel quel).
+
+    Parameters
+    ----------
+    obj : DFRef | pd.DataFrame | None
+        Objet stocké en session
+
+    Returns
+    -------
+    pd.DataFrame | None
+        DataFrame correspondant, ou ``obj`` inchangé s'il n'est pas une ``DFRef``
+    """
+    return obj.load() if isinstance(obj, DFRef) else obj
+
+
+def frame_fingerprint(df: pd.DataFrame, sample_rows: int = 4096) -> tuple:
+    """Empreinte bon marché d'un DataFrame : forme, colonnes, dtypes et lignes réparties.
+
+    Sert de ``hash_funcs`` aux caches Streamlit : évite de hacher tout le
+    contenu à chaque rerun. Au plus ``sample_rows`` lignes sont hachées,
+    prises à pas régulier sur toute la hauteur du DataFrame (première et
+    dernière lignes comprises) : une modification au milieu du fichier
+    change l'empreinte dès qu'elle touche une ligne échantillonnée, et le
+    hachage est complet pour les DataFrames plus petits que l'échantillon.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        DataFrame à identifier
+    sample_rows : int, default=4096
+        Nombre maximal de lignes hachées
+
+    Returns
+    -------
+    tuple
+        (forme, colonnes, dtypes, hachage des lignes échantillonnées)
+    """
+    n = len(df)
+    if n > sample_rows:
+        positions = np.linspace(0, n - 1, sample_rows).round().astype(np.intp)
+        sample = df.iloc[positions]
+    else:
+        sample = df
+    try:
+        digest = int(pd.util.hash_pandas_object(sample, index=True).sum())
+    except TypeError:  # cellules non hachables (listes, dict) : repli sur leur repr
+        digest = int(pd.util.hash_pandas_object(sample.astype(str), index=True).sum())
+    return (
+        df.shape,
+        tuple(map(str, df.columns)),
+        tuple(df.dtypes.astype(str)),
+        digest,
+    )
@@ -7,58 +7,152 @@ quelques graphiques basiques).
 
 from __future__ import annotations
 
+import matplotlib
+
+matplotlib.use("Agg")  # rendu hors écran : pas de boucle d'événements GUI côté serveur
 import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
 import seaborn as sns
 import streamlit as st
-from sklearn.metrics import (
-    confusion_matrix,
-    precision_recall_curve,
-    roc_curve,
-    auc,
-    classification_report,
-    precision_score,
-    recall_score,
-)
+from sklearn.metrics import auc
+
+
+def _confusion_counts(y_true: pd.Series, y_pred: pd.Series) -> tuple[np.ndarray, np.ndarray]:
+    """Matrice de confusion sur l'union des classes, en un seul passage.
+
+    Les étiquettes sont encodées une fois en entiers contigus
+    (``np.unique(return_inverse=True)``) puis comptées avec ``np.bincount``.
+
+    Returns:
+        (classes triées, matrice K x K : lignes = réel, colonnes = prédit)
+    """
+    n = len(y_true)
+    classes, codes = np.unique(
+        np.concatenate([np.asarray(y_true), np.asarray(y_pred)]), return_inverse=True
+    )
+    k = len(classes)
+    cm = np.bincount(codes[:n] * k + codes[n:], minlength=k * k).reshape(k, k)
+    return classes, cm
+
+
+def _classification_report_df(classes: np.ndarray, cm: np.ndarray) -> pd.DataFrame:
+    """Rapport de classification (type ``classification_report``) tiré de la matrice.
+
+    Précision, rappel et F1 par classe se déduisent de la diagonale et des
+    sommes de lignes / colonnes ; une division par zéro donne 0.
+    """
+    tp = np.diag(cm).astype(np.float64)
+    support = cm.sum(axis=1)
+    predicted = cm.sum(axis=0)
+    total = support.sum()
+
+    def _ratio(num, den):
+        return np.divide(num, den, out=np.zeros_like(num, dtype=np.float64), where=den > 0)
+
+    precision = _ratio(tp, predicted)
+    recall = _ratio(tp, support)
+    f1 = _ratio(2 * precision * recall, precision + recall)
+    metrics = np.column_stack([precision, recall, f1])
+
+    report = pd.DataFrame(metrics, index=[str(c) for c in classes],
+                          columns=["precision", "recall", "f1-score"])
+    report["support"] = support
+    accuracy = tp.sum() / total if total else 0.0
+    report.loc["accuracy"] = [np.nan, np.nan, accuracy, total]
+    report.loc["macro avg"] = [*metrics.mean(axis=0), total]
+    weights = support / total if total else np.zeros(len(support))
+    report.loc["weighted avg"] = [*(weights @ metrics), total]
+    return report
+
+
+def _binary_curves(is_positive: np.ndarray, scores: np.ndarray) -> tuple[np.ndarray, ...]:
+    """Courbes ROC et Precision-Recall à partir d'un seul tri des scores.
+
+    Reprend le balayage de ``sklearn.metrics`` (un point par seuil distinct)
+    mais partage le tri et les cumuls entre les deux courbes.
+
+    Returns:
+        (fpr, tpr, precision, recall), mêmes conventions que ``roc_curve`` et
+        ``precision_recall_curve`` de scikit-learn
+    """
+    order = np.argsort(scores, kind="mergesort")[::-1]
+    scores = scores[order]
+    is_positive = is_positive[order]
+
+    # Dernier indice de chaque seuil distinct
+    threshold_idx = np.r_[np.flatnonzero(np.diff(scores)), scores.size - 1]
+    tps = np.cumsum(is_positive, dtype=np.int64)[threshold_idx]
+    fps = threshold_idx + 1 - tps
+
+    fpr = np.r_[0.0, fps / fps[-1]]
+    tpr = np.r_[0.0, tps / tps[-1]]
+
+    # Precision-Recall : ordre inversé (rappel décroissant), point final (rappel 0, précision 1)
+    precision = np.r_[(tps / (tps + fps))[::-1], 1.0]
+    recall = np.r_[(tps / tps[-1])[::-1], 0.0]
+    return fpr, tpr, precision, recall
+
+
+def _residual_stats(y_true: np.ndarray, residuals: np.ndarray) -> tuple[float, float, float]:
+    """MAE, RMSE et MAPE (%) à partir des résidus, sans temporaires superflus.
+
+    La valeur absolue des résidus est calculée une fois et réutilisée ;
+    la somme des carrés passe par un produit scalaire. MAPE vaut NaN dès
+    qu'une valeur réelle est nulle.
+    """
+    n = residuals.shape[0]
+    abs_res = np.abs(residuals)
+    mae = abs_res.sum() / n
+    rmse = np.sqrt(np.dot(residuals, residuals) / n)
+    if np.all(y_true != 0):
+        mape = np.divide(abs_res, np.abs(y_true), out=abs_res).sum() / n * 100
+    else:
+        mape = np.nan
+    return mae, rmse, mape
 
 
 def analyze_by_segment(y_test: pd.Series, y_pred: pd.Series, segment_col: pd.Series, task_type: str) -> pd.DataFrame:
-    """Analyse les performances par segment."""
-    from sklearn.metrics import accuracy_score, f1_score, mean_squared_error, r2_score
-    
+    """Analyse les performances par segment.
+
+    Les métriques sont calculées par agrégations groupby (un seul passage
+    sur les données) plutôt qu'en filtrant le DataFrame segment par segment.
+    """
+    # Codes entiers plutôt que chaînes : groupby sans re-hachage des libellés
+    if not isinstance(segment_col.dtype, pd.CategoricalDtype):
+        segment_col = segment_col.astype('category')
     df_analysis = pd.DataFrame({
         'y_test': y_test,
         'y_pred': y_pred,
         'segment': segment_col
     })
+    groups = df_analysis.groupby('segment', sort=False, observed=True)
     
-    results = []
-    for segment in df_analysis['segment'].unique():
-        segment_data = df_analysis[df_analysis['segment'] == segment]
-        y_true_seg = segment_data['y_test']
-        y_pred_seg = segment_data['y_pred']
+    if task_type == "classification":
+        df_analysis['correct'] = (df_analysis['y_test'] == df_analysis['y_pred']).astype('int8')
+        results = groups['correct'].agg(Nombre='size', Accuracy='mean')
         
-        if task_type == "classification":
-            acc = accuracy_score(y_true_seg, y_pred_seg)
-            f1 = f1_score(y_true_seg, y_pred_seg, average='weighted', zero_division=0)
-            results.append({
-                'Segment': segment,
-                'Nombre': len(segment_data),
-                'Accuracy': acc,
-                'F1-Score': f1
-            })
-        else:
-            mse = mean_squared_error(y_true_seg, y_pred_seg)
-            r2 = r2_score(y_true_seg, y_pred_seg)
-            results.append({
-                'Segment': segment,
-                'Nombre': len(segment_data),
-                'RMSE': np.sqrt(mse),
-                'R²': r2
-            })
+        # F1 pondéré : F1_c = 2·TP / (n_vrais + n_prédits), pondéré par le support
+        n_true = df_analysis.groupby(['segment', 'y_test'], observed=True).size()
+        n_pred = df_analysis.groupby(['segment', 'y_pred'], observed=True).size()
+        tp = df_analysis[df_analysis['correct'] == 1].groupby(['segment', 'y_test'], observed=True).size()
+        n_pred.index.names = n_true.index.names
+        n_true, n_pred = n_true.align(n_pred, fill_value=0)
+        tp = tp.reindex(n_true.index, fill_value=0)
+        f1_class = (2 * tp / (n_true + n_pred)).fillna(0)
+        weighted = (f1_class * n_true).groupby(level='segment', sort=False).sum()
+        results['F1-Score'] = weighted / results['Nombre']
+    else:
+        df_analysis['sq_err'] = (df_analysis['y_test'] - df_analysis['y_pred']) ** 2
+        results = groups['sq_err'].agg(Nombre='size', mse='mean')
+        var = groups['y_test'].var(ddof=0)
+        mse = results.pop('mse')
+        results['RMSE'] = np.sqrt(mse)
+        # R² = 1 - SSE/SST, mêmes conventions que sklearn (variance nulle, un seul point)
+        r2 = (1 - mse / var).where(var > 0, np.where(mse == 0, 1.0, 0.0))
+        results['R²'] = r2.where(results['Nombre'] >= 2)
     
-    return pd.DataFrame(results)
+    return results.rename_axis('Segment').reset_index()
 
 
 def show_evaluation(info: dict) -> None:
@@ -101,20 +195,25 @@ def show_evaluation(info: dict) -> None:
 
     if task_type == "classification":
         st.subheader("🧩 Matrice de confusion")
-        labels = sorted(y_test.unique())
-        cm = confusion_matrix(y_test, y_pred, labels=labels)
+        # Une seule passe d'encodage/comptage pour la matrice et le rapport
+        classes, cm_all = _confusion_counts(y_test, y_pred)
+        in_test = cm_all.sum(axis=1) > 0  # classes présentes dans y_test
+        labels = classes[in_test].tolist()
+        cm = cm_all[np.ix_(in_test, in_test)]
 
         fig, ax = plt.subplots(figsize=(6, 5))
         sns.heatmap(cm, annot=True, fmt="d", cmap="Blues", xticklabels=labels, yticklabels=labels, ax=ax)
         ax.set_xlabel("Prédictions")
         ax.set_ylabel("Valeurs réelles")
         st.pyplot(fig)
+        plt.close(fig)
         
         # Métriques détaillées
         st.subheader("📊 Métriques détaillées")
         try:
-            precision = precision_score(y_test, y_pred, average="weighted", zero_division=0)
-            recall = recall_score(y_test, y_pred, average="weighted", zero_division=0)
+            report_df = _classification_report_df(classes, cm_all)
+            precision = report_df.loc["weighted avg", "precision"]
+            recall = report_df.loc["weighted avg", "recall"]
             col1, col2 = st.columns(2)
             with col1:
                 st.metric("Precision (weighted)", f"{precision:.4f}")
@@ -122,8 +221,6 @@ def show_evaluation(info: dict) -> None:
                 st.metric("Recall (weighted)", f"{recall:.4f}")
             
             # Rapport de classification
-            report = classification_report(y_test, y_pred, output_dict=True, zero_division=0)
-            report_df = pd.DataFrame(report).transpose()
             st.dataframe(report_df, use_container_width=True)
         except Exception as e:
             st.warning(f"Impossible de calculer les métriques détaillées : {e}")
@@ -134,12 +231,12 @@ def show_evaluation(info: dict) -> None:
             if y_proba is not None and len(y_proba.shape) == 2:
                 st.subheader("📈 Courbes PR et ROC")
                 
-                # Courbe Precision-Recall
-                precision_curve, recall_curve, _ = precision_recall_curve(y_test, y_proba[:, 1])
+                # Courbes ROC et Precision-Recall (un seul tri des scores ;
+                # la colonne 1 des probabilités correspond à la seconde classe)
+                fpr, tpr, precision_curve, recall_curve = _binary_curves(
+                    (y_test == labels[1]).to_numpy(), np.asarray(y_proba[:, 1], dtype=np.float64)
+                )
                 pr_auc = auc(recall_curve, precision_curve)
-                
-                # Courbe ROC
-                fpr, tpr, _ = roc_curve(y_test, y_proba[:, 1])
                 roc_auc = auc(fpr, tpr)
                 
                 fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(12, 5))
@@ -162,6 +259,7 @@ def show_evaluation(info: dict) -> None:
                 ax2.grid(True, alpha=0.3)
                 
                 st.pyplot(fig)
+                plt.close(fig)
         
         # Analyse par segment (si X_test disponible)
         if "X_test" in info:
@@ -175,15 +273,18 @@ def show_evaluation(info: dict) -> None:
                     if segment_col:
                         # Créer un DataFrame avec les résultats
                         eval_df = pd.DataFrame({
-                            "segment": X_test[segment_col],
+                            "segment": X_test[segment_col].astype("category"),
                             "y_test": y_test,
                             "y_pred": y_pred
                         })
                         
-                        # Calculer l'accuracy par segment
-                        segment_acc = eval_df.groupby("segment").apply(
-                            lambda g: (g["y_test"] == g["y_pred"]).mean()
-                        ).reset_index(name="accuracy")
+                        # Calculer l'accuracy par segment (agrégation groupby sans callback Python)
+                        eval_df["correct"] = eval_df["y_test"] == eval_df["y_pred"]
+                        segment_acc = (
+                            eval_df.groupby("segment", observed=True)["correct"]
+                            .mean()
+                            .reset_index(name="accuracy")
+                        )
                         
                         st.dataframe(segment_acc, use_container_width=True)
                         
@@ -195,6 +296,7 @@ def show_evaluation(info: dict) -> None:
                         ax.set_title(f"Performance par {segment_col}")
                         plt.xticks(rotation=45, ha="right")
                         st.pyplot(fig)
+                        plt.close(fig)
 
     else:
         st.subheader("📈 Prédictions vs valeurs réelles")
@@ -206,6 +308,7 @@ def show_evaluation(info: dict) -> None:
         ax.set_xlabel("Valeurs réelles")
         ax.set_ylabel("Prédictions")
         st.pyplot(fig)
+        plt.close(fig)
 
         st.subheader("📉 Résidus")
         residuals = y_test - y_pred
@@ -213,12 +316,13 @@ def show_evaluation(info: dict) -> None:
         sns.histplot(residuals, kde=True, ax=ax2)
         ax2.set_xlabel("Résidus (réel - prédit)")
         st.pyplot(fig2)
+        plt.close(fig2)
         
         # Métriques orientées risque pour régression
         st.subheader("⚠️ Métriques orientées risque")
-        mae = np.abs(residuals).mean()
-        rmse = np.sqrt((residuals ** 2).mean())
-        mape = (np.abs(residuals / y_test) * 100).mean() if (y_test != 0).all() else np.nan
+        mae, rmse, mape = _residual_stats(
+            y_test.to_numpy(dtype=np.float64), residuals.to_numpy(dtype=np.float64)
+        )
         
         col1, col2, col3 = st.columns(3)
         with col1:
@@ -240,14 +344,15 @@ def show_evaluation(info: dict) -> None:
                     
                     if segment_col:
                         eval_df = pd.DataFrame({
-                            "segment": X_test[segment_col],
+                            "segment": X_test[segment_col].astype("category"),
                             "y_test": y_test,
                             "y_pred": y_pred
                         })
                         
-                        # Calculer RMSE par segment
-                        segment_rmse = eval_df.groupby("segment").apply(
-                            lambda g: np.sqrt(((g["y_test"] - g["y_pred"]) ** 2).mean())
+                        # Calculer RMSE par segment (agrégation groupby sans callback Python)
+                        eval_df["sq_err"] = (eval_df["y_test"] - eval_df["y_pred"]) ** 2
+                        segment_rmse = np.sqrt(
+                            eval_df.groupby("segment", observed=True)["sq_err"].mean()
                         ).reset_index(name="rmse")
                         
                         st.dataframe(segment_rmse, use_container_width=True)
@@ -260,3 +365,4 @@ def show_evaluation(info: dict) -> None:
                         ax.set_title(f"Erreur par {segment_col}")
                         plt.xticks(rotation=45, ha="right")
                         st.pyplot(fig)
+                        plt.close(fig)
@@ -9,12 +9,19 @@ import geopandas as gpd
 import pandas as pd
 from shapely.geometry import shape, Point, Polygon
 import numpy as np
+import shapely
+from scipy.spatial import cKDTree
 from sklearn.cluster import DBSCAN
 import warnings
 
+from .core import _projected_hazard, _same_crs
+
 # Désactiver les avertissements
 warnings.filterwarnings('ignore')
 
+# Rayon moyen de la Terre (mètres), pour les distances de haversine
+EARTH_RADIUS_M = 6_371_008.8
+
 def spatial_join_hazard(
     gdf: gpd.GeoDataFrame,
     hazard_data: gpd.GeoDataFrame,
@@ -33,18 +40,42 @@ def spatial_join_hazard(
     Returns:
         GeoDataFrame résultant de la jointure
     """
-    # Vérifier les CRS
-    if gdf.crs != hazard_data.crs:
-        hazard_data = hazard_data.to_crs(gdf.crs)
+    # Aléas dans le CRS des points : reprojection et index STRtree mis en
+    # cache par couche, réutilisés d'un appel à l'autre
+    hazard_data, _ = _projected_hazard(hazard_data, gdf.crs)
     
-    # Effectuer la jointure spatiale
-    return gpd.sjoin(gdf, hazard_data, how=how, op=op)
+    # Effectuer la jointure spatiale (requête groupée sur l'index STRtree
+    # des aléas ; ``op`` a été renommé ``predicate`` et retiré de geopandas 1.0)
+    return gpd.sjoin(gdf, hazard_data, how=how, predicate=op)
+
+def _all_points(geoms: np.ndarray) -> bool:
+    """Vrai si toutes les géométries sont des points non vides."""
+    return bool(
+        (shapely.get_type_id(geoms) == shapely.GeometryType.POINT).all()
+        and not shapely.is_empty(geoms).any()
+    )
+
+def _point_coordinates(geoms: np.ndarray) -> np.ndarray:
+    """
+    Coordonnées (x, y) de points, extraites en un seul appel.
+    
+    Args:
+        geoms: Tableau de géométries ponctuelles
+        
+    Returns:
+        Tableau float64 de forme (N, 2)
+    """
+    xy = shapely.get_coordinates(geoms)
+    if len(xy) != len(geoms):
+        raise ValueError("Les géométries doivent être des points non vides")
+    return xy
 
 def calculate_water_proximity(
     gdf: gpd.GeoDataFrame,
     water_bodies: gpd.GeoDataFrame,
     max_distance: float = 1000,
-    distance_col: str = 'distance_to_water'
+    distance_col: str = 'distance_to_water',
+    inplace: bool = False
 ) -> gpd.GeoDataFrame:
     """
     Calcule la distance aux plans d'eau les plus proches.
@@ -54,36 +85,46 @@ def calculate_water_proximity(
         water_bodies: GeoDataFrame des plans d'eau
         max_distance: Distance maximale de recherche (mètres)
         distance_col: Nom de la colonne de sortie pour la distance
+        inplace: Si True, ajoute la colonne directement à ``gdf`` (pas de copie)
         
     Returns:
         GeoDataFrame avec la colonne de distance ajoutée
     """
-    # Vérifier les CRS et convertir en projection métrique si nécessaire
-    if gdf.crs != water_bodies.crs:
-        water_bodies = water_bodies.to_crs(gdf.crs)
-    
-    # Créer une copie pour éviter les modifications sur l'original
-    result = gdf.copy()
-    
-    # Calculer la distance au plan d'eau le plus proche
-    def get_min_distance(point, water_geoms):
-        distances = water_geoms.distance(point)
-        return distances.min()
-    
-    # Convertir en projection métrique si nécessaire (EPSG:3857 pour les mètres)
-    if not gdf.crs.is_projected:
-        metric_crs = 'EPSG:3857'
-        gdf_metric = gdf.to_crs(metric_crs)
-        water_bodies_metric = water_bodies.to_crs(metric_crs)
-    else:
-        gdf_metric = gdf
-        water_bodies_metric = water_bodies
-    
-    # Calculer les distances
-    water_geoms = water_bodies_metric.geometry.unary_union
-    result[distance_col] = gdf_metric.geometry.apply(
-        lambda x: min(x.distance(water_geoms), max_distance)
+    # Par défaut, travailler sur une copie pour ne pas modifier l'original
+    result = gdf if inplace else gdf.copy()
+    
+    # Rien à chercher : ni reprojection ni index
+    if gdf.empty or water_bodies.empty:
+        result[distance_col] = float(max_distance)
+        return result
+    
+    # CRS métrique de calcul (EPSG:3857 pour les mètres si gdf n'est pas projeté).
+    # Seules les géométries sont reprojetées, chacune une seule fois et
+    # directement vers ce CRS ; le résultat reste dans le CRS d'origine.
+    metric_crs = gdf.crs if gdf.crs.is_projected else 'EPSG:3857'
+    points = gdf.geometry.to_crs(metric_crs).values
+    # Plans d'eau reprojetés et leur STRtree : mis en cache par couche
+    water_proj, water_index = _projected_hazard(water_bodies, metric_crs)
+    
+    water_values = water_proj.geometry.values
+    if _all_points(points) and _all_points(water_values):
+        # Points vers points (stations, puits...) : k-d tree sur les coordonnées,
+        # distances euclidiennes NumPy sans passer par GEOS
+        tree = cKDTree(shapely.get_coordinates(water_values))
+        dists, _ = tree.query(
+            shapely.get_coordinates(points), k=1, distance_upper_bound=max_distance
+        )
+        result[distance_col] = np.minimum(dists, max_distance)
+        return result
+    
+    # Plus proche voisin via le STRtree en cache, recherche bornée à
+    # max_distance : seuls les plans d'eau candidats dans ce rayon sont mesurés
+    (point_idx, _), dists = water_index.nearest(
+        points, return_all=False, max_distance=max_distance, return_distance=True
     )
+    distances = np.full(len(points), float(max_distance))
+    distances[point_idx] = dists
+    result[distance_col] = distances
     
     return result
 
@@ -114,16 +155,20 @@ def add_climate_scenario(
         else:
             raise ValueError("Format de fichier non supporté. Utilisez .shp ou .geojson")
     
+    # Filtrer les colonnes du scénario avant la jointure : seules
+    # l'identifiant, la géométrie et ces colonnes traversent le sjoin
+    scenario_cols = [c for c in scenario_data.columns 
+                    if scenario_name in c.lower() and str(year) in c]
+    scenario_slim = scenario_data[scenario_cols + [scenario_data.geometry.name]]
+    
     # Vérifier les CRS
-    if gdf.crs != scenario_data.crs:
-        scenario_data = scenario_data.to_crs(gdf.crs)
+    if not _same_crs(gdf.crs, scenario_slim.crs):
+        scenario_slim = scenario_slim.to_crs(gdf.crs)
     
     # Effectuer la jointure spatiale
-    joined = gpd.sjoin(gdf, scenario_data, how='left', op='intersects')
-    
-    # Filtrer les colonnes du scénario
-    scenario_cols = [c for c in scenario_data.columns 
-                    if scenario_name in c.lower() and str(year) in c]
+    joined = gpd.sjoin(
+        gdf[[id_col, 'geometry']], scenario_slim, how='left', predicate='intersects'
+    )
     
     # Conserver uniquement les colonnes nécessaires
     keep_cols = [id_col, 'geometry'] + scenario_cols
@@ -135,7 +180,8 @@ def detect_clusters(
     gdf: gpd.GeoDataFrame,
     eps: float = 0.1,
     min_samples: int = 5,
-    cluster_col: str = 'cluster'
+    cluster_col: str = 'cluster',
+    geodesic: bool = False
 ) -> gpd.GeoDataFrame:
     """
     Détecte les clusters spatiaux avec DBSCAN.
@@ -143,17 +189,44 @@ def detect_clusters(
     Args:
         gdf: GeoDataFrame des points
         eps: Distance maximale entre deux échantillons pour les regrouper
+            (unités du CRS, ou mètres si ``geodesic``)
         min_samples: Nombre minimum d'échantillons dans un voisinage
         cluster_col: Nom de la colonne de sortie pour les clusters
+        geodesic: Si True, distance de haversine sur les longitudes/latitudes
+            (points reprojetés en WGS84 si besoin) au lieu de la distance
+            euclidienne sur les coordonnées brutes
         
     Returns:
         GeoDataFrame avec la colonne de cluster ajoutée
     """
-    # Extraire les coordonnées
-    coords = np.column_stack((gdf.geometry.x, gdf.geometry.y))
-    
-    # Appliquer DBSCAN
-    dbscan = DBSCAN(eps=eps, min_samples=min_samples, metric='euclidean')
+    if geodesic:
+        # Haversine sur (lat, lon) en radians ; eps en mètres -> radians
+        geoms = gdf.geometry
+        if gdf.crs is not None and not gdf.crs.is_geographic:
+            geoms = geoms.to_crs('EPSG:4326')
+        coords = np.radians(_point_coordinates(geoms.values)[:, ::-1])
+        dbscan = DBSCAN(
+            eps=eps / EARTH_RADIUS_M,
+            min_samples=min_samples,
+            metric='haversine',
+            algorithm='ball_tree',
+            leaf_size=40,
+            n_jobs=-1
+        )
+    else:
+        # Extraire les coordonnées (un seul appel, tableau (N, 2) contigu)
+        coords = _point_coordinates(gdf.geometry.values)
+        
+        # Appliquer DBSCAN : voisinages via un k-d tree (pas de matrice de distances
+        # N x N), requêtes réparties sur tous les cœurs
+        dbscan = DBSCAN(
+            eps=eps,
+            min_samples=min_samples,
+            metric='euclidean',
+            algorithm='kd_tree',
+            leaf_size=40,
+            n_jobs=-1
+        )
     clusters = dbscan.fit_predict(coords)
     
     # Ajouter les clusters au GeoDataFrame
@@ -6,16 +6,87 @@ Fournit la classe GeoProcessor pour les opérations géospatiales fondamentales.
 
 from typing import Dict, List, Optional, Union, Tuple, Any
 from pathlib import Path
+import importlib.util
 import numpy as np
 import pandas as pd
 import geopandas as gpd
 import rioxarray
+import shapely
+import xarray as xr
 from shapely.geometry import Point, Polygon, shape
+import threading
 import warnings
+import weakref
 
 # Désactiver les avertissements
 warnings.filterwarnings('ignore')
 
+# Lecture du MNT par tuiles (optionnelle) : nécessite dask
+_HAS_DASK = importlib.util.find_spec("dask") is not None
+
+def _same_crs(a: Any, b: Any) -> bool:
+    """
+    Compare deux CRS (objets pyproj ou chaînes) en évitant si possible
+    la comparaison complète de pyproj.
+    
+    Args:
+        a: Premier CRS
+        b: Second CRS
+        
+    Returns:
+        True si les deux CRS sont équivalents
+    """
+    if a is b:
+        return True
+    if a is None or b is None:
+        return False
+    # Même définition d'origine (ex: 'EPSG:4326') : égalité sans analyse WKT
+    if getattr(a, 'srs', a) == getattr(b, 'srs', b):
+        return True
+    return a == b
+
+
+# Couches reprojetées (aléas, plans d'eau) : (id, CRS) -> (réf. faible vers la
+# couche source, ses géométries, couche reprojetée). Partagé entre sessions.
+_projection_cache: Dict[Tuple[int, str], Tuple[Any, Any, gpd.GeoDataFrame]] = {}
+_projection_lock = threading.Lock()
+
+def _projected_hazard(layer: gpd.GeoDataFrame, crs: Any) -> Tuple[gpd.GeoDataFrame, Any]:
+    """
+    Retourne ``layer`` reprojetée dans ``crs`` et son index spatial STRtree.
+    
+    La reprojection et l'index ne sont calculés qu'une fois par couche et par
+    CRS : l'index (``sindex`` de geopandas) est conservé par la couche
+    reprojetée et réutilisé par ``gpd.sjoin`` et les requêtes de proximité.
+    L'entrée est invalidée si la couche est libérée ou si ses géométries
+    sont remplacées.
+    
+    Args:
+        layer: Couche d'aléas ou de plans d'eau
+        crs: CRS cible
+        
+    Returns:
+        Tuple (couche dans ``crs``, index spatial de ses géométries)
+    """
+    if _same_crs(layer.crs, crs):
+        # Pas de reprojection : geopandas garde déjà l'index sur la couche
+        return layer, layer.sindex
+    key = (id(layer), str(crs))
+    geoms = layer.geometry.values
+    with _projection_lock:
+        cached = _projection_cache.get(key)
+    if cached is None or cached[0]() is not layer or cached[1] is not geoms:
+        projected = layer.to_crs(crs)
+        projected.sindex  # construit une fois, conservé par la couche
+        cached = (weakref.ref(layer), geoms, projected)
+        with _projection_lock:
+            # Purger les entrées dont la couche source a été libérée
+            for k in [k for k, v in _projection_cache.items() if v[0]() is None]:
+                del _projection_cache[k]
+            _projection_cache[key] = cached
+    return cached[2], cached[2].sindex
+
+
 class GeoProcessor:
     """
     Classe pour le traitement des données géospatiales pour l'analyse des risques climatiques.
@@ -49,7 +120,10 @@ class GeoProcessor:
         Returns:
             GeoDataFrame avec des géométries de points
         """
-        geometry = gpd.points_from_xy(df[lon_col], df[lat_col])
+        lat = df[lat_col].to_numpy(dtype=np.float64, na_value=np.nan)
+        lon = df[lon_col].to_numpy(dtype=np.float64, na_value=np.nan)
+        # Construction vectorisée : un seul appel shapely sur un tableau (N, 2) contigu
+        geometry = shapely.points(np.column_stack((lon, lat)))
         return gpd.GeoDataFrame(df, geometry=geometry, crs=self.crs)
     
     def load_hazard_data(self, file_path: Union[str, Path]) -> gpd.GeoDataFrame:
@@ -69,44 +143,65 @@ class GeoProcessor:
             self.hazard_data = gpd.read_file(file_path)
         else:
             raise ValueError("Format de fichier non supporté. Utilisez .shp ou .geojson")
-            
+        
         return self.hazard_data
     
     def add_elevation(
         self, 
         gdf: gpd.GeoDataFrame, 
         dem_path: Union[str, Path],
-        elevation_col: str = 'elevation'
+        elevation_col: str = 'elevation',
+        chunk_size: int = 1024
     ) -> gpd.GeoDataFrame:
         """
         Ajoute des données d'élévation à partir d'un MNT.
         
+        Si dask est installé, le MNT est ouvert par tuiles de ``chunk_size``
+        pixels : seules les tuiles contenant des points sont lues, en
+        parallèle, et la mémoire reste bornée pour les très grands rasters.
+        
         Args:
             gdf: GeoDataFrame d'entrée
             dem_path: Chemin vers le fichier MNT
             elevation_col: Nom de la colonne d'élévation de sortie
+            chunk_size: Taille des tuiles (pixels) pour la lecture par dask
             
         Returns:
             GeoDataFrame avec la colonne d'élévation ajoutée
         """
         # Implémentation simplifiée - à adapter selon le format du MNT
-        dem = rioxarray.open_rasterio(dem_path)
+        if _HAS_DASK:
+            dem = rioxarray.open_rasterio(
+                dem_path, chunks={'band': 1, 'x': chunk_size, 'y': chunk_size}, lock=False
+            )
+        else:
+            dem = rioxarray.open_rasterio(dem_path)
+        if 'band' in dem.dims:
+            dem = dem.isel(band=0)
+        
+        xs = gdf.geometry.x.to_numpy()
+        ys = gdf.geometry.y.to_numpy()
+        
+        # Coordonnées -> indices de pixel via la transformation affine inverse
+        # (la cellule qui contient le point est celle dont le centre est le plus proche)
+        cols, rows = ~dem.rio.transform() * (xs, ys)
+        cols = np.floor(cols)
+        rows = np.floor(rows)
+        
+        # Points valides et dans l'emprise du MNT (les NaN donnent False)
+        inside = (
+            gdf.geometry.is_valid.to_numpy()
+            & (cols >= 0) & (cols < dem.rio.width)
+            & (rows >= 0) & (rows < dem.rio.height)
+        )
         
-        def get_elevation(point):
-            # Vérifier si le point est valide
-            if not point.is_valid:
-                return np.nan
-                
-            # Extraire la valeur d'élévation au point
-            try:
-                return float(dem.sel(
-                    x=point.x, 
-                    y=point.y, 
-                    method='nearest'
-                ).values[0])
-            except:
-                return np.nan
+        # Une seule indexation positionnelle vectorisée pour tous les points
+        elevation = np.full(len(gdf), np.nan)
+        if inside.any():
+            elevation[inside] = dem.isel(
+                x=xr.DataArray(cols[inside].astype(np.intp), dims='points'),
+                y=xr.DataArray(rows[inside].astype(np.intp), dims='points')
+            ).values
         
-        # Appliquer à tous les points
-        gdf[elevation_col] = gdf.geometry.apply(get_elevation)
+        gdf[elevation_col] = elevation
         return gdf
@@ -12,8 +12,11 @@ import geopandas as gpd
 import numpy as np
 import pydeck as pdk
 import plotly.express as px
+import shapely
 import streamlit as st
-from sklearn.cluster import KMeans
+from sklearn.cluster import MiniBatchKMeans
+
+from .core import _same_crs
 
 # Détection automatique des colonnes de coordonnées
 def detect_lat_lon_columns(df: pd.DataFrame) -> Tuple[Optional[str], Optional[str]]:
@@ -45,7 +48,7 @@ def create_map(
     Args:
         gdf: GeoDataFrame contenant les données géographiques
         value_col: Colonne à utiliser pour la coloration/échelle
-        map_type: Type de visualisation ('points', 'heatmap', 'cluster')
+        map_type: Type de visualisation ('points', 'heatmap', 'cluster', 'hexagon')
         **kwargs: Arguments supplémentaires pour la personnalisation
         
     Returns:
@@ -55,43 +58,86 @@ def create_map(
     if not isinstance(gdf, gpd.GeoDataFrame):
         raise ValueError("L'entrée doit être un GeoDataFrame")
     
-    # Convertir en WGS84 si nécessaire
-    if gdf.crs and gdf.crs != 'EPSG:4326':
-        gdf = gdf.to_crs('EPSG:4326')
+    # Convertir en WGS84 si nécessaire (géométries seules, pas tout le GeoDataFrame)
+    geometry = gdf.geometry
+    if gdf.crs and not _same_crs(gdf.crs, 'EPSG:4326'):
+        geometry = geometry.to_crs('EPSG:4326')
+    
+    # Extraire les coordonnées en un seul appel (tableau (N, 2)) dans un
+    # DataFrame réduit aux colonnes utiles aux couches pydeck
+    values = geometry.values
+    xy = shapely.get_coordinates(values)
+    if len(xy) != len(values):
+        # Points vides ou manquants : conserver une ligne (NaN) par entité
+        xy = np.column_stack((shapely.get_x(values), shapely.get_y(values)))
+    # st.pydeck_chart envoie les couches en JSON (pas de transport binaire
+    # hors Jupyter) : arrondir à 1e-6 degré (~0,1 m) raccourcit chaque
+    # coordonnée de ~18 à ~10 caractères sans perte visible
+    coords_df = pd.DataFrame({
+        'longitude': np.round(xy[:, 0], 6),
+        'latitude': np.round(xy[:, 1], 6),
+    })
+    if value_col:
+        values = gdf[value_col].to_numpy()
+        if values.dtype.kind == 'f':
+            values = _round_significant(values)
+        coords_df[value_col] = values
     
-    # Extraire les coordonnées
-    gdf = gdf.copy()
-    gdf['longitude'] = gdf.geometry.x
-    gdf['latitude'] = gdf.geometry.y
+    # Vue initiale centrée sur les données, calculée une seule fois
+    # pour toutes les couches
+    lon_mean, lat_mean = np.nanmean(xy, axis=0)
+    view_state = pdk.ViewState(
+        latitude=float(lat_mean),
+        longitude=float(lon_mean),
+        zoom=5,
+        pitch=0,
+    )
     
     # Créer la carte selon le type demandé
     if map_type == "points":
-        return _create_point_map(gdf, value_col, **kwargs)
+        return _create_point_map(coords_df, view_state, value_col, **kwargs)
     elif map_type == "heatmap":
-        return _create_heatmap(gdf, value_col, **kwargs)
+        return _create_heatmap(coords_df, view_state, value_col, **kwargs)
     elif map_type == "cluster":
-        return _create_cluster_map(gdf, value_col, **kwargs)
+        return _create_cluster_map(coords_df, view_state, value_col, **kwargs)
+    elif map_type == "hexagon":
+        return _create_hexagon_map(coords_df, view_state, value_col, **kwargs)
     else:
         raise ValueError(f"Type de carte non supporté: {map_type}")
 
+def _round_significant(values: np.ndarray, digits: int = 6) -> np.ndarray:
+    """
+    Arrondit des réels à ``digits`` chiffres significatifs.
+    
+    Les couches pydeck sont envoyées en JSON : un float64 brut s'y écrit en
+    ~18 caractères, contre ~8 une fois arrondi (un float32 ne raccourcit
+    rien, il est relu en float64 à la sérialisation).
+    
+    Args:
+        values: Tableau de réels (NaN et infinis conservés)
+        digits: Nombre de chiffres significatifs
+        
+    Returns:
+        Tableau float64 arrondi
+    """
+    vals = np.asarray(values, dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        magnitude = np.floor(np.log10(np.abs(vals)))
+    magnitude[~np.isfinite(magnitude)] = 0
+    scale = 10.0 ** (digits - 1 - magnitude)
+    return np.round(vals * scale) / scale
+
 def _create_point_map(
-    gdf: gpd.GeoDataFrame,
+    coords_df: pd.DataFrame,
+    view_state: pdk.ViewState,
     value_col: Optional[str] = None,
     **kwargs
 ) -> pdk.Deck:
     """Crée une carte avec des points."""
-    # Configuration de la vue initiale
-    view_state = pdk.ViewState(
-        latitude=gdf['latitude'].mean(),
-        longitude=gdf['longitude'].mean(),
-        zoom=5,
-        pitch=0,
-    )
-    
     # Couche de points
     layer = pdk.Layer(
         'ScatterplotLayer',
-        data=gdf,
+        data=coords_df,
         get_position=['longitude', 'latitude'],
         get_radius=100,
         get_fill_color=[255, 0, 0, 160],
@@ -106,23 +152,16 @@ def _create_point_map(
     )
 
 def _create_heatmap(
-    gdf: gpd.GeoDataFrame,
+    coords_df: pd.DataFrame,
+    view_state: pdk.ViewState,
     value_col: Optional[str] = None,
     **kwargs
 ) -> pdk.Deck:
     """Crée une carte de chaleur."""
-    # Configuration de la vue initiale
-    view_state = pdk.ViewState(
-        latitude=gdf['latitude'].mean(),
-        longitude=gdf['longitude'].mean(),
-        zoom=5,
-        pitch=0,
-    )
-    
     # Couche de heatmap
     layer = pdk.Layer(
         'HeatmapLayer',
-        data=gdf,
+        data=coords_df,
         get_position=['longitude', 'latitude'],
         get_weight=value_col or 1,
         radius_pixels=30,
@@ -136,31 +175,30 @@ def _create_heatmap(
     )
 
 def _create_cluster_map(
-    gdf: gpd.GeoDataFrame,
+    coords_df: pd.DataFrame,
+    view_state: pdk.ViewState,
     value_col: Optional[str] = None,
     n_clusters: int = 5,
     **kwargs
 ) -> pdk.Deck:
     """Crée une carte avec des clusters."""
-    # Appliquer le clustering K-means
-    coords = gdf[['longitude', 'latitude']].values
-    kmeans = KMeans(n_clusters=min(n_clusters, len(coords)), random_state=42)
-    gdf['cluster'] = kmeans.fit_predict(coords)
+    # Appliquer le clustering K-means par mini-lots (float32 : deux fois moins
+    # de mémoire parcourue ; précision largement suffisante pour des degrés)
+    coords = coords_df[['longitude', 'latitude']].to_numpy(dtype=np.float32)
+    kmeans = MiniBatchKMeans(
+        n_clusters=min(n_clusters, len(coords)),
+        batch_size=min(1024, len(coords)),
+        n_init=3,
+        random_state=42
+    )
+    coords_df['cluster'] = kmeans.fit_predict(coords)
     
     # Calculer le centre et la taille de chaque cluster
-    clusters = gdf.groupby('cluster').agg({
-        'longitude': 'mean',
-        'latitude': 'mean',
-        'geometry': 'count'
-    }).rename(columns={'geometry': 'size'}).reset_index()
-    
-    # Configuration de la vue initiale
-    view_state = pdk.ViewState(
-        latitude=clusters['latitude'].mean(),
-        longitude=clusters['longitude'].mean(),
-        zoom=5,
-        pitch=0,
-    )
+    clusters = coords_df.groupby('cluster').agg(
+        longitude=('longitude', 'mean'),
+        latitude=('latitude', 'mean'),
+        size=('longitude', 'size')
+    ).reset_index()
     
     # Couche de clusters
     layer = pdk.Layer(
@@ -179,6 +217,43 @@ def _create_cluster_map(
         tooltip={"text": "Taille du cluster: {size}"}
     )
 
+def _create_hexagon_map(
+    coords_df: pd.DataFrame,
+    view_state: pdk.ViewState,
+    value_col: Optional[str] = None,
+    radius: int = 1000,
+    **kwargs
+) -> pdk.Deck:
+    """Crée une carte d'hexagones agrégés sur le GPU.
+
+    Les points bruts sont envoyés tels quels : le regroupement en hexagones
+    (somme de ``value_col``, ou comptage) est fait par WebGL dans le
+    navigateur et recalculé sans aller-retour Python lors des zooms.
+    """
+    # Vue inclinée pour le relief des hexagones
+    view_state.pitch = 40
+    
+    # Couche d'hexagones (agrégation GPU)
+    layer = pdk.Layer(
+        'HexagonLayer',
+        data=coords_df,
+        get_position=['longitude', 'latitude'],
+        get_elevation_weight=value_col or 1,
+        get_color_weight=value_col or 1,
+        elevation_aggregation='SUM',
+        color_aggregation='SUM',
+        gpu_aggregation=True,
+        radius=radius,
+        elevation_scale=50,
+        extruded=True,
+        pickable=False,
+    )
+    
+    return pdk.Deck(
+        layers=[layer],
+        initial_view_state=view_state
+    )
+
 def show_risk_map(
     df: pd.DataFrame,
     lat_col: str,
@@ -201,11 +276,34 @@ def show_risk_map(
         return
 
     if use_pydeck:
-        # Utiliser PyDeck pour une visualisation plus riche
-        st.pydeck_chart(create_map(df, value_col=color_col))
+        # Utiliser PyDeck pour une visualisation plus riche (seules les
+        # colonnes affichées sont transmises, sans copie du DataFrame)
+        cols = list(dict.fromkeys([lat_col, lon_col] + ([color_col] if color_col else [])))
+        st.pydeck_chart(_cached_map(df[cols], lat_col, lon_col, color_col, "points"))
     else:
-        # Utiliser la carte simple de Streamlit
-        st.map(df.rename(columns={lat_col: "lat", lon_col: "lon"}))
+        # Utiliser la carte simple de Streamlit : colonnes désignées par leur
+        # nom plutôt que renommées (rename recopiait tout le DataFrame)
+        st.map(df, latitude=lat_col, longitude=lon_col)
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def _cached_map(
+    df: pd.DataFrame,
+    lat_col: str,
+    lon_col: str,
+    value_col: str,
+    map_type: str
+) -> pdk.Deck:
+    """
+    Construit (une fois par jeu de données et d'options) la carte pydeck.
+    
+    Les réexécutions Streamlit sans changement de données ni d'options
+    réutilisent la carte au lieu de recréer les géométries.
+    """
+    gdf = gpd.GeoDataFrame(
+        df,
+        geometry=gpd.points_from_xy(df[lon_col], df[lat_col])
+    )
+    return create_map(gdf, value_col=value_col, map_type=map_type)
 
 def run_maps_page(df: pd.DataFrame, title: str = "Carte des risques") -> None:
     """
@@ -245,19 +343,14 @@ def run_maps_page(df: pd.DataFrame, title: str = "Carte des risques") -> None:
     # Type de visualisation
     map_type = st.selectbox(
         "Type de visualisation",
-        ["Points", "Heatmap", "Cluster"]
+        ["Points", "Heatmap", "Cluster", "Hexagon"]
     ).lower()
     
     # Afficher la carte
     try:
-        # Créer un GeoDataFrame
-        gdf = gpd.GeoDataFrame(
-            df,
-            geometry=gpd.points_from_xy(df[lon_col], df[lat_col])
-        )
-        
-        # Afficher la carte
-        st.pydeck_chart(create_map(gdf, value_col=color_col, map_type=map_type))
+        # Seules les colonnes utiles entrent dans la clé de cache
+        cols = list(dict.fromkeys([lat_col, lon_col] + ([color_col] if color_col else [])))
+        st.pydeck_chart(_cached_map(df[cols], lat_col, lon_col, color_col, map_type))
         
     except Exception as e:
         st.error(f"Erreur lors de la création de la carte : {e}")
@@ -23,7 +23,37 @@ class InsuranceAnalyzer:
             'high': (0.75, 0.95),
             'extreme': (0.95, 1.0)
         }
+        self.premium_factors = {
+            'low': 0.8,
+            'medium': 1.0,
+            'high': 1.5,
+            'extreme': 2.5
+        }
+        # Tableaux NumPy dérivés : bornes des classes et facteurs, dans l'ordre
+        self._risk_labels = list(self.risk_categories)
+        self._risk_edges = np.array(
+            [low for low, _ in self.risk_categories.values()]
+            + [list(self.risk_categories.values())[-1][1]],
+            dtype=np.float64
+        )
+        self._risk_factors = np.array(
+            [self.premium_factors[label] for label in self._risk_labels] + [np.nan]
+        )
+    
+    def _risk_codes(self, risk_scores: pd.Series) -> np.ndarray:
+        """
+        Indice de classe de risque de chaque score (-1 si manquant ou hors bornes).
         
+        Intervalles fermés à droite, le premier incluant sa borne basse
+        (mêmes conventions que ``pd.cut(..., include_lowest=True)``).
+        """
+        scores = risk_scores.to_numpy(dtype=np.float64, na_value=np.nan)
+        edges = self._risk_edges
+        codes = np.searchsorted(edges[1:-1], scores, side='left')
+        outside = ~((scores >= edges[0]) & (scores <= edges[-1]))  # NaN inclus
+        codes[outside] = -1
+        return codes
+    
     def categorize_risk(
         self, 
         risk_scores: pd.Series
@@ -37,12 +67,12 @@ class InsuranceAnalyzer:
         Returns:
             Série pandas avec les catégories de risque
         """
-        return pd.cut(
-            risk_scores,
-            bins=[0, 0.25, 0.75, 0.95, 1.0],
-            labels=['low', 'medium', 'high', 'extreme'],
-            include_lowest=True
+        categories = pd.Categorical.from_codes(
+            self._risk_codes(risk_scores),
+            categories=self._risk_labels,
+            ordered=True
         )
+        return pd.Series(categories, index=risk_scores.index, name=risk_scores.name)
     
     def calculate_premiums(
         self,
@@ -59,13 +89,35 @@ class InsuranceAnalyzer:
         Returns:
             Série pandas avec les primes calculées
         """
-        factors = {
-            'low': 0.8,
-            'medium': 1.0,
-            'high': 1.5,
-            'extreme': 2.5
-        }
-        return base_premium * risk_categories.map(factors)
+        if (
+            isinstance(risk_categories.dtype, pd.CategoricalDtype)
+            and list(risk_categories.cat.categories) == self._risk_labels
+        ):
+            # Codes entiers -> facteurs par indexation NumPy (-1 -> NaN)
+            factors = self._risk_factors[risk_categories.cat.codes.to_numpy()]
+            return pd.Series(base_premium * factors, index=risk_categories.index)
+        return base_premium * risk_categories.map(self.premium_factors).astype(float)
+    
+    def categorize_and_price(
+        self,
+        risk_scores: pd.Series,
+        base_premium: float
+    ) -> pd.Series:
+        """
+        Calcule directement les primes à partir des scores de risque.
+        
+        Équivaut à ``calculate_premiums(base_premium, categorize_risk(scores))``
+        sans construire la série catégorielle intermédiaire.
+        
+        Args:
+            risk_scores: Série pandas contenant les scores de risque (0-1)
+            base_premium: Prime de base pour le risque moyen
+            
+        Returns:
+            Série pandas avec les primes calculées
+        """
+        factors = self._risk_factors[self._risk_codes(risk_scores)]
+        return pd.Series(base_premium * factors, index=risk_scores.index)
     
     def estimate_claim_frequency(
         self,
@@ -93,7 +145,8 @@ class InsuranceAnalyzer:
         frequency: pd.Series,
         severity: pd.Series,
         safety_load: float = 0.3,
-        expense_ratio: float = 0.25
+        expense_ratio: float = 0.25,
+        dtype: type = np.float64
     ) -> pd.Series:
         """
         Calcule la prime technique en fonction de la fréquence et de la sévérité des sinistres.
@@ -103,14 +156,22 @@ class InsuranceAnalyzer:
             severity: Série pandas contenant les coûts moyens des sinistres
             safety_load: Charge de sécurité (défaut: 0.3 pour 30%)
             expense_ratio: Ratio des frais généraux (défaut: 0.25 pour 25%)
+            dtype: Type de calcul ; np.float32 divise par deux le volume
+                mémoire mais ne garde que ~7 chiffres significatifs
             
         Returns:
             Série pandas avec les primes techniques calculées
         """
-        pure_premium = frequency * severity
-        risk_premium = pure_premium * (1 + safety_load)
-        technical_premium = risk_premium / (1 - expense_ratio)
-        return technical_premium
+        if not frequency.index.equals(severity.index):
+            frequency, severity = frequency.align(severity)
+        
+        # Prime pure × (1 + chargement) / (1 - frais) : un seul facteur
+        # constant, appliqué en place sur le produit fréquence × sévérité
+        factor = (1 + safety_load) / (1 - expense_ratio)
+        technical_premium = frequency.to_numpy(dtype=dtype, na_value=np.nan)
+        technical_premium = technical_premium * severity.to_numpy(dtype=dtype, na_value=np.nan)
+        technical_premium *= technical_premium.dtype.type(factor)
+        return pd.Series(technical_premium, index=frequency.index)
     
     def calculate_risk_aggregates(
         self,
@@ -129,19 +190,19 @@ class InsuranceAnalyzer:
         Returns:
             Dictionnaire contenant les métriques de risque
         """
-        # Trier les pertes par ordre décroissant
-        losses = gdf[loss_column].sort_values(ascending=False).reset_index(drop=True)
+        losses = gdf[loss_column].to_numpy(dtype=np.float64, na_value=np.nan)
+        losses = losses[~np.isnan(losses)]
         n = len(losses)
         
         # Calculer l'AAL (Average Annual Loss)
         aal = losses.mean()
         
-        # Calculer la PML pour différentes périodes de retour
-        pml_results = {}
-        for rp in return_periods:
-            rank = n / rp
-            idx = min(int(round(rank)), n - 1)
-            pml_results[f'PML_{rp}'] = losses.iloc[idx]
+        # Calculer la PML pour différentes périodes de retour : la perte de
+        # rang round(n / rp) par ordre décroissant, obtenue par sélection
+        # partielle (np.partition, O(n)) plutôt que par un tri complet
+        ranks = {rp: n - 1 - min(int(round(n / rp)), n - 1) for rp in return_periods}
+        selected = np.partition(losses, sorted(set(ranks.values())))
+        pml_results = {f'PML_{rp}': selected[k] for rp, k in ranks.items()}
         
         # Retourner les résultats
         return {
@@ -5,46 +5,86 @@ Permet d'entraîner et comparer plusieurs modèles ML pour le risque climatique.
 
 from __future__ import annotations
 
+import os
 import time
-from typing import Any, Dict, List, Tuple
+from functools import lru_cache
+from operator import itemgetter
+from typing import Any, Dict, List, Optional, Tuple
 
 import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
 import seaborn as sns
 import streamlit as st
+from joblib import Parallel, delayed
+from scipy.stats import randint
+from sklearn.base import clone
+from sklearn.compose import ColumnTransformer
 from sklearn.ensemble import (
     AdaBoostClassifier,
     AdaBoostRegressor,
     ExtraTreesClassifier,
     ExtraTreesRegressor,
-    GradientBoostingClassifier,
-    GradientBoostingRegressor,
+    HistGradientBoostingClassifier,
+    HistGradientBoostingRegressor,
     RandomForestClassifier,
     RandomForestRegressor,
 )
 from sklearn.linear_model import Lasso, LinearRegression, LogisticRegression, Ridge
 from sklearn.metrics import accuracy_score, f1_score, mean_squared_error, r2_score
-from sklearn.model_selection import cross_val_score, train_test_split
+from sklearn.model_selection import RandomizedSearchCV, cross_val_score, train_test_split
 from sklearn.naive_bayes import GaussianNB
 from sklearn.neighbors import KNeighborsClassifier, KNeighborsRegressor
 from sklearn.pipeline import Pipeline
 from sklearn.tree import DecisionTreeClassifier, DecisionTreeRegressor
+from threadpoolctl import threadpool_limits
 
 # Importer les utilitaires communs
+from clim_data_utils import frame_fingerprint, get_categorical_columns
 from clim_model_utils import detect_task_type, build_preprocessor
 
+try:  # Optimisation bayésienne (TPE) optionnelle pour l'affinage
+    import optuna
 
-def get_available_models(task: str, fast_mode: bool = False) -> Dict[str, Any]:
-    """Retourne les modèles disponibles selon la tâche."""
+    optuna.logging.set_verbosity(optuna.logging.WARNING)
+except ImportError:
+    optuna = None
+
+HAS_OPTUNA = optuna is not None
+
+
+def get_available_models(
+    task: str, fast_mode: bool = False, selected_models: Optional[List[str]] = None
+) -> Dict[str, Any]:
+    """Retourne les modèles disponibles selon la tâche.
+
+    Chaque appel renvoie des copies neuves (``clone``) des modèles de
+    référence, limitées à ``selected_models`` si fourni : elles peuvent être
+    modifiées (``class_weight``...) et entraînées sans effet sur les appels
+    suivants.
+    """
+    return {
+        name: clone(model)
+        for name, model in _model_templates(task, fast_mode).items()
+        if not selected_models or name in selected_models
+    }
+
+
+@lru_cache(maxsize=4)
+def _model_templates(task: str, fast_mode: bool) -> Dict[str, Any]:
+    """Modèles de référence par (tâche, mode rapide), construits une seule fois.
+
+    Le dictionnaire est partagé par le cache : ne jamais le modifier ni
+    entraîner ses modèles, passer par ``get_available_models``.
+    """
     if task == "classification":
         if fast_mode:
             return {
                 "Random Forest": RandomForestClassifier(
                     n_estimators=50, max_depth=10, random_state=42, n_jobs=-1
                 ),
-                "Gradient Boosting": GradientBoostingClassifier(
-                    n_estimators=50, max_depth=3, random_state=42
+                "Gradient Boosting": HistGradientBoostingClassifier(
+                    max_iter=50, random_state=42
                 ),
                 "Logistic Regression": LogisticRegression(
                     max_iter=500, random_state=42, n_jobs=-1
@@ -57,7 +97,7 @@ def get_available_models(task: str, fast_mode: bool = False) -> Dict[str, Any]:
         else:
             return {
                 "Random Forest": RandomForestClassifier(random_state=42, n_jobs=-1),
-                "Gradient Boosting": GradientBoostingClassifier(random_state=42),
+                "Gradient Boosting": HistGradientBoostingClassifier(random_state=42),
                 "Logistic Regression": LogisticRegression(
                     max_iter=1000, random_state=42, n_jobs=-1
                 ),
@@ -73,8 +113,8 @@ def get_available_models(task: str, fast_mode: bool = False) -> Dict[str, Any]:
                 "Random Forest": RandomForestRegressor(
                     n_estimators=50, max_depth=10, random_state=42, n_jobs=-1
                 ),
-                "Gradient Boosting": GradientBoostingRegressor(
-                    n_estimators=50, max_depth=3, random_state=42
+                "Gradient Boosting": HistGradientBoostingRegressor(
+                    max_iter=50, random_state=42
                 ),
                 "Linear Regression": LinearRegression(n_jobs=-1),
                 "Ridge": Ridge(random_state=42),
@@ -86,7 +126,7 @@ def get_available_models(task: str, fast_mode: bool = False) -> Dict[str, Any]:
         else:
             return {
                 "Random Forest": RandomForestRegressor(random_state=42, n_jobs=-1),
-                "Gradient Boosting": GradientBoostingRegressor(random_state=42),
+                "Gradient Boosting": HistGradientBoostingRegressor(random_state=42),
                 "Linear Regression": LinearRegression(n_jobs=-1),
                 "Ridge": Ridge(random_state=42),
                 "Lasso": Lasso(random_state=42),
@@ -97,6 +137,58 @@ def get_available_models(task: str, fast_mode: bool = False) -> Dict[str, Any]:
             }
 
 
+def _evaluate_pipeline(
+    pipe: Pipeline,
+    X_train: pd.DataFrame,
+    X_test: pd.DataFrame,
+    y_train: pd.Series,
+    y_test: pd.Series,
+    task: str,
+    compute_train_score: bool = True,
+) -> Dict[str, Any]:
+    """Prédictions et métriques (test, train, F1/RMSE) d'un pipeline déjà entraîné.
+
+    Sans ``compute_train_score``, le score train vaut None : la seconde
+    passe de prédiction, sur tout le jeu d'entraînement, est évitée.
+    """
+    # Prédictions
+    y_pred = pipe.predict(X_test)
+    y_train_pred = pipe.predict(X_train) if compute_train_score else None
+
+    # Probabilités pour classification
+    y_proba = None
+    if task == "classification" and hasattr(pipe, "predict_proba"):
+        try:
+            y_proba = pipe.predict_proba(X_test)
+        except Exception:
+            y_proba = None
+
+    # Métriques
+    if task == "classification":
+        test_score = accuracy_score(y_test, y_pred)
+        train_score = accuracy_score(y_train, y_train_pred) if compute_train_score else None
+        f1 = f1_score(y_test, y_pred, average="weighted", zero_division=0)
+        rmse = None
+        metric_name = "Accuracy"
+    else:
+        test_score = r2_score(y_test, y_pred)
+        train_score = r2_score(y_train, y_train_pred) if compute_train_score else None
+        f1 = None
+        rmse = np.sqrt(mean_squared_error(y_test, y_pred))
+        metric_name = "R²"
+
+    return {
+        "test_score": test_score,
+        "train_score": train_score,
+        "f1_score": f1,
+        "rmse": rmse,
+        "metric_name": metric_name,
+        "y_test": y_test,
+        "y_pred": y_pred,
+        "y_proba": y_proba,
+    }
+
+
 def train_and_evaluate_model(
     model_name: str,
     model: Any,
@@ -108,50 +200,44 @@ def train_and_evaluate_model(
     task: str,
     use_cv: bool = False,
     cv_folds: int = 5,
+    n_jobs: int = -1,
+    compute_train_score: bool = True,
 ) -> Dict[str, Any]:
-    """Entraîne et évalue un modèle."""
+    """Entraîne et évalue un modèle.
+
+    ``n_jobs`` est le nombre de folds de validation croisée entraînés en
+    parallèle (-1 : tous les cœurs). ``compute_train_score=False`` évite de
+    reprédire tout le jeu d'entraînement (score train à None).
+    """
     start_time = time.time()
 
     try:
+        # Le boosting par histogrammes n'accepte que des matrices denses
+        if isinstance(model, (HistGradientBoostingClassifier, HistGradientBoostingRegressor)):
+            preprocessor = clone(preprocessor).set_params(sparse_threshold=0)
+
         # Créer le pipeline
         pipe = Pipeline([("preprocessor", preprocessor), ("model", model)])
 
         # Entraîner
         pipe.fit(X_train, y_train)
 
-        # Prédictions
-        y_pred = pipe.predict(X_test)
-        y_train_pred = pipe.predict(X_train)
-        
-        # Probabilités pour classification
-        y_proba = None
-        if task == "classification" and hasattr(pipe, "predict_proba"):
-            try:
-                y_proba = pipe.predict_proba(X_test)
-            except Exception:
-                y_proba = None
-
-        # Métriques
-        if task == "classification":
-            test_score = accuracy_score(y_test, y_pred)
-            train_score = accuracy_score(y_train, y_train_pred)
-            f1 = f1_score(y_test, y_pred, average="weighted", zero_division=0)
-            rmse = None
-            metric_name = "Accuracy"
-        else:
-            test_score = r2_score(y_test, y_pred)
-            train_score = r2_score(y_train, y_train_pred)
-            f1 = None
-            rmse = np.sqrt(mean_squared_error(y_test, y_pred))
-            metric_name = "R²"
+        scores = _evaluate_pipeline(
+            pipe, X_train, X_test, y_train, y_test, task, compute_train_score
+        )
 
         # Cross-validation
         cv_scores = None
         if use_cv:
             try:
                 scoring = "accuracy" if task == "classification" else "r2"
+                cv_pipe = pipe
+                if n_jobs != 1 and "n_jobs" in model.get_params():
+                    # Parallélisme sur les folds : le modèle reste mono-cœur
+                    # pour ne pas surcharger la machine (folds × threads)
+                    cv_pipe = clone(pipe).set_params(model__n_jobs=1)
                 cv_scores = cross_val_score(
-                    pipe, X_train, y_train, cv=cv_folds, scoring=scoring
+                    cv_pipe, X_train, y_train, cv=cv_folds, scoring=scoring, n_jobs=n_jobs
                 )
             except Exception:
                 cv_scores = None
@@ -159,18 +245,13 @@ def train_and_evaluate_model(
         result = {
             "model_name": model_name,
             "pipeline": pipe,
-            "test_score": test_score,
-            "train_score": train_score,
-            "f1_score": f1,
-            "rmse": rmse,
+            **scores,
             "cv_scores": cv_scores,
             "training_time": time.time() - start_time,
-            "metric_name": metric_name,
             "success": True,
+            "X_train": X_train,
+            "y_train": y_train,
             "X_test": X_test,
-            "y_test": y_test,
-            "y_pred": y_pred,
-            "y_proba": y_proba,
         }
 
     except Exception as e:
@@ -191,8 +272,60 @@ def train_and_evaluate_model(
     return result
 
 
-def validate_data_for_modeling(X: pd.DataFrame, y: pd.Series) -> Tuple[bool, List[str], List[str]]:
-    """Valide les données avant modélisation."""
+def _train_model_task(
+    single_thread: bool, model_name: str, *args: Any
+) -> Tuple[str, Dict[str, Any]]:
+    """Tâche joblib de ``compare_models`` : ``train_and_evaluate_model`` nommé.
+
+    Avec ``single_thread``, les threads OpenMP du thread courant sont limités
+    à 1 (boosting par histogrammes) : plusieurs modèles s'entraînent déjà en
+    parallèle. La limite OpenMP est propre au thread appelant.
+    """
+    if single_thread:
+        with threadpool_limits(limits=1, user_api="openmp"):
+            return model_name, train_and_evaluate_model(model_name, *args)
+    return model_name, train_and_evaluate_model(model_name, *args)
+
+
+@st.cache_resource(show_spinner=False, max_entries=4, hash_funcs={pd.DataFrame: frame_fingerprint})
+def _cached_preprocessor(X_train: pd.DataFrame) -> ColumnTransformer:
+    """``build_preprocessor`` mis en cache sur l'empreinte de X_train.
+
+    L'empreinte porte sur le contenu (lignes réparties sur tout X_train),
+    pas seulement sur les colonnes : le choix des colonnes encodées dépend
+    de leur cardinalité. Le préprocesseur est partagé et jamais entraîné : le
+    cloner avant usage (voir ``compare_models``).
+    """
+    return build_preprocessor(X_train)
+
+
+def _estimate_size_mb(data: pd.DataFrame | pd.Series, sample_rows: int = 1000) -> float:
+    """Taille mémoire estimée (Mo) de ``data``, extrapolée d'un échantillon.
+
+    ``memory_usage(deep=True)`` parcourt chaque objet Python des colonnes
+    texte : on ne le fait que sur ``sample_rows`` lignes réparties
+    régulièrement, puis on extrapole au nombre total de lignes.
+    """
+    n_rows = len(data)
+    index_size = data.index.memory_usage()
+    if n_rows > 2 * sample_rows:
+        data = data.iloc[np.linspace(0, n_rows - 1, sample_rows).astype(np.intp)]
+    # Index de l'échantillon exclu : il ne reflète pas celui d'origine
+    # (un RangeIndex ne coûte rien, sa sélection si)
+    size = data.memory_usage(index=False, deep=True)
+    if isinstance(size, pd.Series):
+        size = size.sum()
+    return (float(size) * n_rows / max(len(data), 1) + index_size) / 1024 / 1024
+
+
+def validate_data_for_modeling(
+    X: pd.DataFrame, y: pd.Series, size_mb: Optional[float] = None
+) -> Tuple[bool, List[str], List[str]]:
+    """Valide les données avant modélisation.
+
+    ``size_mb`` (taille de X et y, voir ``_estimate_size_mb``) évite de la
+    réestimer si l'appelant l'a déjà calculée.
+    """
     errors = []
     warnings = []
     
@@ -206,28 +339,47 @@ def validate_data_for_modeling(X: pd.DataFrame, y: pd.Series) -> Tuple[bool, Lis
     if len(X) != len(y):
         errors.append(f"❌ Incompatibilité : X={len(X)} lignes, y={len(y)} valeurs")
     
-    # Vérifications non-bloquantes
-    nan_cols = X.columns[X.isna().any()].tolist()
+    # Vérifications non-bloquantes (une passe pour toutes les colonnes)
+    na_any = X.isna().any(axis=0)
+    nan_cols = na_any.index[na_any].tolist()
     if nan_cols:
         if len(nan_cols) <= 5:
             warnings.append(f"⚠️ {len(nan_cols)} colonne(s) avec NaN : {', '.join(nan_cols)}")
         else:
             warnings.append(f"⚠️ {len(nan_cols)} colonnes avec NaN")
     
-    # Haute cardinalité
-    cat_cols = X.select_dtypes(include=["object", "category"]).columns
-    high_card = [col for col in cat_cols if X[col].nunique() > 100]
+    # Haute cardinalité : colonnes catégorielles repérées sur les seuls dtypes,
+    # puis un unique nunique sur ces colonnes
+    cat_cols = get_categorical_columns(X)
+    cardinality = X[cat_cols].nunique()
+    high_card = cardinality.index[cardinality > 100].tolist()
     if high_card:
         warnings.append(f"⚠️ {len(high_card)} colonne(s) à haute cardinalité (> 100 valeurs)")
     
     # Taille du dataset
-    total_size_mb = (X.memory_usage(deep=True).sum() + y.memory_usage(deep=True)) / 1024 / 1024
+    total_size_mb = size_mb if size_mb is not None else _estimate_size_mb(X) + _estimate_size_mb(y)
     if total_size_mb > 500:
         warnings.append(f"⚠️ Dataset volumineux ({total_size_mb:.1f} MB)")
     
     return len(errors) == 0, errors, warnings
 
 
+def split_train_test(
+    X: pd.DataFrame,
+    y: pd.Series,
+    task: str,
+    test_size: float = 0.2,
+    handle_imbalance: bool = False,
+) -> Tuple[pd.DataFrame, pd.DataFrame, pd.Series, pd.Series]:
+    """Découpage train/test reproductible (stratifié en classification si possible)."""
+    try:
+        if task == "classification" and not handle_imbalance:
+            return train_test_split(X, y, test_size=test_size, random_state=42, stratify=y)
+        return train_test_split(X, y, test_size=test_size, random_state=42)
+    except Exception:
+        return train_test_split(X, y, test_size=test_size, random_state=42)
+
+
 def compare_models(
     df: pd.DataFrame,
     target_col: str,
@@ -238,15 +390,24 @@ def compare_models(
     use_cv: bool = False,
     cv_folds: int = 5,
     handle_imbalance: bool = False,
+    n_jobs: int = -1,
 ) -> Tuple[List[Dict[str, Any]], str]:
-    """Compare plusieurs modèles ML avec validation robuste."""
+    """Compare plusieurs modèles ML avec validation robuste.
+
+    ``n_jobs`` est le nombre de modèles entraînés en parallèle (-1 : tous
+    les cœurs). Avec un seul modèle (ou ``n_jobs=1``), il s'applique à la
+    place aux folds de validation croisée (voir ``train_and_evaluate_model``).
+    """
 
     # Préparer les données
     X = df.drop(columns=[target_col])
     y = df[target_col]
 
+    # Taille estimée une seule fois (validation et détection de gros dataset)
+    dataset_size_mb = _estimate_size_mb(X) + _estimate_size_mb(y)
+
     # Validation des données
-    is_valid, errors, warnings = validate_data_for_modeling(X, y)
+    is_valid, errors, warnings = validate_data_for_modeling(X, y, dataset_size_mb)
     
     if not is_valid:
         st.error("❌ **Validation échouée**")
@@ -268,7 +429,6 @@ def compare_models(
         task = detect_task_type(y)
 
     # Détection de gros dataset
-    dataset_size_mb = (X.memory_usage(deep=True).sum() + y.memory_usage(deep=True)) / 1024 / 1024
     n_rows = len(X)
     
     if dataset_size_mb > 5 or n_rows > 10000:
@@ -281,29 +441,13 @@ def compare_models(
             use_cv = False
 
     # Split
-    try:
-        if task == "classification" and not handle_imbalance:
-            X_train, X_test, y_train, y_test = train_test_split(
-                X, y, test_size=test_size, random_state=42, stratify=y
-            )
-        else:
-            X_train, X_test, y_train, y_test = train_test_split(
-                X, y, test_size=test_size, random_state=42
-            )
-    except Exception:
-        X_train, X_test, y_train, y_test = train_test_split(
-            X, y, test_size=test_size, random_state=42
-        )
-
-    # Construire le preprocesseur
-    preprocessor = build_preprocessor(X_train)
+    X_train, X_test, y_train, y_test = split_train_test(X, y, task, test_size, handle_imbalance)
 
-    # Obtenir les modèles disponibles
-    available_models = get_available_models(task, fast_mode)
+    # Construire le preprocesseur (mis en cache entre les reruns)
+    preprocessor = _cached_preprocessor(X_train)
 
-    # Filtrer les modèles sélectionnés
-    if selected_models:
-        available_models = {k: v for k, v in available_models.items() if k in selected_models}
+    # Obtenir les modèles sélectionnés (copies neuves, seules celles utilisées)
+    available_models = get_available_models(task, fast_mode, selected_models)
 
     # Gérer le déséquilibre si demandé
     if handle_imbalance and task == "classification":
@@ -311,40 +455,62 @@ def compare_models(
             if hasattr(model, "class_weight"):
                 model.class_weight = "balanced"
 
-    # Entraîner et évaluer chaque modèle
-    results = []
+    # Entraîner et évaluer les modèles en parallèle (joblib, backend threads :
+    # les ajustements sklearn libèrent le GIL et les données ne sont pas
+    # copiées). Au plus un modèle par cœur, chacun restant mono-cœur
+    # (n_jobs=1, threads OpenMP limités à 1) pour ne pas surcharger la
+    # machine (modèles × threads)
+    n_models = len(available_models)
+    n_workers = max(1, min(n_models, (os.cpu_count() or 1) if n_jobs < 0 else n_jobs))
+    inner_jobs = n_jobs if n_workers == 1 else 1
+    if n_workers > 1:
+        for model in available_models.values():
+            if "n_jobs" in model.get_params():
+                model.set_params(n_jobs=1)
+
+    results = {}
     progress_bar = st.progress(0)
     status_text = st.empty()
     time_text = st.empty()
     
     start_total = time.time()
+    status_text.text(f"🔄 Entraînement de {n_models} modèle(s) ({n_workers} en parallèle)...")
 
-    for i, (model_name, model) in enumerate(available_models.items()):
-        status_text.text(f"🔄 Entraînement : {model_name}... ({i+1}/{len(available_models)})")
-        
-        model_start = time.time()
-        result = train_and_evaluate_model(
+    # Préprocesseur cloné par modèle : chaque pipeline ajuste le sien
+    tasks = (
+        delayed(_train_model_task)(
+            n_workers > 1,
             model_name,
             model,
             X_train,
             X_test,
             y_train,
             y_test,
-            preprocessor,
+            clone(preprocessor),
             task,
             use_cv,
             cv_folds,
+            inner_jobs,
+            # Mode rapide : pas de seconde passe de prédiction sur le train
+            not fast_mode,
         )
-        model_time = time.time() - model_start
-        
-        results.append(result)
-        
+        for model_name, model in available_models.items()
+    )
+    parallel = Parallel(n_jobs=n_workers, backend="threading", return_as="generator_unordered")
+
+    # Suivi dans le thread principal (seul autorisé à écrire dans Streamlit)
+    for i, (model_name, result) in enumerate(parallel(tasks)):
+        results[model_name] = result
+
         if result["success"]:
-            time_text.text(f"⏱️ {model_name} : {model_time:.1f}s")
+            time_text.text(f"⏱️ {model_name} : {result['training_time']:.1f}s")
         else:
             time_text.text(f"❌ {model_name} : Échec")
-        
-        progress_bar.progress((i + 1) / len(available_models))
+
+        progress_bar.progress((i + 1) / n_models)
+
+    # Résultats dans l'ordre des modèles, indépendamment de l'ordre de fin
+    results = [results[model_name] for model_name in available_models]
     
     total_time = time.time() - start_total
     status_text.text(f"✅ Entraînement terminé en {total_time:.1f}s!")
@@ -354,6 +520,177 @@ def compare_models(
     return results, task
 
 
+def tune_random_forest(
+    df: pd.DataFrame,
+    target_col: str,
+    task: str,
+    param_ranges: Dict[str, Tuple[int, int]],
+    n_iter: int = 20,
+    test_size: float = 0.2,
+    cv_folds: int = 3,
+    handle_imbalance: bool = False,
+    n_jobs: int = -1,
+    method: str = "random",
+    study: Any = None,
+    split: Optional[Tuple[pd.DataFrame, pd.DataFrame, pd.Series, pd.Series]] = None,
+    preprocessor: Optional[ColumnTransformer] = None,
+) -> Dict[str, Any]:
+    """Affine une Random Forest par recherche aléatoire ou bayésienne.
+
+    Avec ``method="random"``, les ``n_iter`` configurations sont tirées
+    uniformément dans les bornes ``param_ranges`` (ex.
+    ``{"n_estimators": (50, 500)}``) par RandomizedSearchCV. Avec
+    ``method="tpe"`` (optuna requis), un échantillonneur TPE propose chaque
+    configuration d'après les précédentes ; passer l'étude renvoyée par un
+    appel précédent (``study``) poursuit la recherche au lieu de repartir
+    de zéro. Les configurations sont évaluées en validation croisée sur le
+    jeu d'entraînement, puis le meilleur modèle est réentraîné et évalué.
+
+    ``split`` (X_train, X_test, y_train, y_test) réutilise le découpage de
+    ``compare_models`` au lieu de le refaire à partir de ``df``. Un
+    ``preprocessor`` déjà entraîné sur ce X_train (celui du meilleur modèle
+    comparé) est appliqué une seule fois : la recherche ne porte alors que
+    sur la forêt, sans refaire le prétraitement à chaque essai.
+
+    Returns:
+        Dictionnaire au format de ``train_and_evaluate_model``, avec en plus
+        ``best_params`` et ``study`` (``None`` en recherche aléatoire)
+    """
+    start_time = time.time()
+
+    if split is None:
+        X = df.drop(columns=[target_col])
+        y = df[target_col]
+        if task == "auto":
+            task = detect_task_type(y)
+        split = split_train_test(X, y, task, test_size, handle_imbalance)
+    X_train, X_test, y_train, y_test = split
+    if task == "auto":
+        task = detect_task_type(y_train)
+
+    if task == "classification":
+        model = RandomForestClassifier(
+            random_state=42, n_jobs=1, class_weight="balanced" if handle_imbalance else None
+        )
+        scoring = "accuracy"
+    else:
+        model = RandomForestRegressor(random_state=42, n_jobs=1)
+        scoring = "r2"
+
+    if preprocessor is not None:
+        # Prétraitement déjà appris : on ne cherche que sur la forêt
+        estimator, prefix = model, ""
+        X_search = preprocessor.transform(X_train)
+    else:
+        preprocessor = build_preprocessor(X_train)
+        estimator, prefix = Pipeline([("preprocessor", preprocessor), ("model", model)]), "model__"
+        X_search = X_train
+
+    try:
+        if method == "tpe":
+            study = _tpe_search(
+                estimator, prefix, param_ranges, X_search, y_train, n_iter, cv_folds, scoring, n_jobs, study
+            )
+            best_params = study.best_params
+            cv_scores = np.array(study.best_trial.user_attrs["cv_scores"])
+            best_estimator = clone(estimator).set_params(
+                **{f"{prefix}{name}": value for name, value in best_params.items()}
+            )
+            best_estimator.fit(X_search, y_train)
+        else:
+            param_distributions = {
+                f"{prefix}{name}": randint(low, high + 1) for name, (low, high) in param_ranges.items()
+            }
+            # Parallélisme sur les configurations × folds : chaque forêt reste mono-cœur
+            search = RandomizedSearchCV(
+                estimator,
+                param_distributions,
+                n_iter=n_iter,
+                cv=cv_folds,
+                scoring=scoring,
+                n_jobs=n_jobs,
+                refit=True,
+                random_state=42,
+            )
+            search.fit(X_search, y_train)
+            best_estimator = search.best_estimator_
+            best_params = {k[len(prefix):]: v for k, v in search.best_params_.items()}
+            cv_scores = np.array(
+                [search.cv_results_[f"split{i}_test_score"][search.best_index_] for i in range(cv_folds)]
+            )
+    except Exception as e:
+        return {
+            "model_name": "Random Forest",
+            "pipeline": None,
+            "test_score": None,
+            "train_score": None,
+            "f1_score": None,
+            "rmse": None,
+            "cv_scores": None,
+            "training_time": time.time() - start_time,
+            "metric_name": None,
+            "success": False,
+            "error": str(e),
+        }
+
+    if prefix:
+        best_pipe = best_estimator
+    else:
+        # Réassembler le pipeline complet avec le prétraitement déjà entraîné
+        best_pipe = Pipeline([("preprocessor", preprocessor), ("model", best_estimator)])
+    # Le modèle final peut prédire sur tous les cœurs
+    best_pipe.set_params(model__n_jobs=-1)
+    return {
+        "model_name": "Random Forest",
+        "pipeline": best_pipe,
+        **_evaluate_pipeline(best_pipe, X_train, X_test, y_train, y_test, task),
+        "cv_scores": cv_scores,
+        "training_time": time.time() - start_time,
+        "success": True,
+        "X_test": X_test,
+        "best_params": best_params,
+        "task": task,
+        "study": study if method == "tpe" else None,
+    }
+
+
+def _tpe_search(
+    estimator: Any,
+    prefix: str,
+    param_ranges: Dict[str, Tuple[int, int]],
+    X_train: Any,
+    y_train: pd.Series,
+    n_trials: int,
+    cv_folds: int,
+    scoring: str,
+    n_jobs: int,
+    study: Any = None,
+) -> Any:
+    """Lance ``n_trials`` essais Optuna (TPE) sur ``estimator`` et retourne l'étude.
+
+    Les essais sont séquentiels (chacun profite des précédents) ; les folds
+    de chaque essai sont évalués en parallèle. ``prefix`` est le préfixe des
+    hyperparamètres dans ``estimator`` (``"model__"`` pour un pipeline).
+    """
+    if optuna is None:
+        raise ImportError("optuna n'est pas installé (pip install optuna)")
+    if study is None:
+        study = optuna.create_study(direction="maximize", sampler=optuna.samplers.TPESampler(seed=42))
+
+    def objective(trial):
+        params = {
+            f"{prefix}{name}": trial.suggest_int(name, low, high) for name, (low, high) in param_ranges.items()
+        }
+        scores = cross_val_score(
+            clone(estimator).set_params(**params), X_train, y_train, cv=cv_folds, scoring=scoring, n_jobs=n_jobs
+        )
+        trial.set_user_attr("cv_scores", scores.tolist())
+        return scores.mean()
+
+    study.optimize(objective, n_trials=n_trials, n_jobs=1)
+    return study
+
+
 def display_comparison_results(results: List[Dict[str, Any]], task: str) -> Dict[str, Any]:
     """Affiche les résultats de comparaison avec graphiques."""
 
@@ -371,7 +708,7 @@ def display_comparison_results(results: List[Dict[str, Any]], task: str) -> Dict
         row = {
             "Modèle": r["model_name"],
             "Score Test": r["test_score"],
-            "Score Train": r["train_score"],
+            "Score Train": np.nan if r["train_score"] is None else r["train_score"],
             "Temps (s)": r["training_time"],
         }
         
@@ -390,7 +727,7 @@ def display_comparison_results(results: List[Dict[str, Any]], task: str) -> Dict
     results_df = results_df.sort_values("Score Test", ascending=False).reset_index(drop=True)
 
     # Identifier le meilleur modèle
-    best_result = successful_results[np.argmax([r["test_score"] for r in successful_results])]
+    best_result = max(successful_results, key=itemgetter("test_score"))
     
     # Afficher le meilleur modèle en haut
     st.success(
@@ -97,7 +97,7 @@ def build_preprocessor(X: pd.DataFrame, do_scale: bool = True, handle_high_cardi
     if X.shape[1] == 0:
         raise ValueError("Le DataFrame X n'a aucune colonne")
     
-    numeric_features = X.select_dtypes(include=["int64", "float64"]).columns.tolist()
+    numeric_features = X.select_dtypes(include=["number"]).columns.tolist()
     categorical_features = X.select_dtypes(include=["object", "category"]).columns.tolist()
 
     transformers = []
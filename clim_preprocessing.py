@@ -8,18 +8,95 @@ from __future__ import annotations
 
 from typing import Literal, Optional, Tuple, Dict, List, Union, Any
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+import importlib.util
+import os
+import threading
 import warnings
 import numpy as np
 import pandas as pd
-import geopandas as gpd
 from datetime import datetime
 
+from clim_data_utils import guess_date_format, to_datetime_fast
+
 # Désactiver les avertissements
 warnings.filterwarnings('ignore')
 
 # Type pour la fréquence d'agrégation
 AggregationFreq = Literal["Aucune", "Jour", "Mois"]
 
+# Moteur numba de pandas pour les fenêtres glissantes (optionnel).
+# parallel=False : le parallélisme vient du pool de threads de _rolling_many,
+# les noyaux nogil pouvant s'exécuter simultanément dans plusieurs threads.
+_HAS_NUMBA = importlib.util.find_spec("numba") is not None
+_NUMBA_ENGINE_KWARGS = {"nopython": True, "nogil": True, "parallel": False}
+_numba_warmed_up = False
+_numba_warmup_lock = threading.Lock()
+
+
+def _rolling_agg(frame: pd.DataFrame, window: int, func: str) -> pd.DataFrame:
+    """Applique une agrégation glissante (sum, mean, min, max) à toutes les colonnes.
+
+    Si numba est installé, utilise le moteur numba de pandas en mode
+    ``method="table"`` : une seule boucle compilée parcourt toutes les
+    colonnes de ``frame`` à la fois. Si numba est inutilisable (absent ou
+    compilation impossible), repli sur le moteur Cython standard ; toute
+    autre erreur (fenêtre invalide, type non numérique...) est propagée.
+    """
+    if _HAS_NUMBA:
+        from numba.core.errors import NumbaError
+
+        try:
+            roller = frame.rolling(window=window, min_periods=1, method="table")
+            return getattr(roller, func)(engine="numba", engine_kwargs=_NUMBA_ENGINE_KWARGS)
+        except (ImportError, NumbaError):
+            pass
+    return getattr(frame.rolling(window=window, min_periods=1), func)()
+
+
+def _rolling_many(frame: pd.DataFrame, windows: List[int], func: str) -> Dict[int, pd.DataFrame]:
+    """Calcule une agrégation glissante pour chaque fenêtre, en parallèle.
+
+    Chaque fenêtre est une tâche : un seul appel ``_rolling_agg`` sur toutes
+    les colonnes. Les tâches s'exécutent dans un pool de threads : les
+    boucles numba (``nogil``) comme celles de pandas libèrent le GIL, le
+    calcul est donc réellement réparti sur les cœurs.
+
+    Returns:
+        Dictionnaire {fenêtre: DataFrame des colonnes agrégées}
+    """
+    if len(windows) <= 1:
+        return {w: _rolling_agg(frame, w, func) for w in windows}
+
+    # La compilation numba n'est pas sûre entre threads : on la fait avant
+    # de répartir les tâches, dans le thread courant.
+    warmup_rolling_engine()
+
+    with ThreadPoolExecutor(max_workers=min(len(windows), os.cpu_count() or 1)) as executor:
+        results = executor.map(lambda w: _rolling_agg(frame, w, func), windows)
+        return dict(zip(windows, results))
+
+
+def warmup_rolling_engine() -> None:
+    """Compile une fois les noyaux numba utilisés par les features glissantes.
+
+    Évite que la compilation JIT (~1 s) tombe sur le premier clic
+    « Appliquer le prétraitement ». Sans effet si numba est absent ou si
+    la compilation a déjà eu lieu dans ce processus. Peut être appelée depuis
+    un thread d'arrière-plan : un appel concurrent attend la fin de la
+    compilation en cours au lieu de la relancer.
+    """
+    global _numba_warmed_up
+    if not _HAS_NUMBA or _numba_warmed_up:
+        return
+    with _numba_warmup_lock:
+        if _numba_warmed_up:
+            return
+        sample = pd.DataFrame({"a": [1.0, 2.0, 3.0], "b": [3.0, 2.0, 1.0]})
+        for func in ("sum", "mean", "min", "max"):
+            _rolling_agg(sample, 2, func)
+        _numba_warmed_up = True
+
 
 def parse_datetime_column(df: pd.DataFrame, date_col: str) -> pd.DataFrame:
     """Convertit une colonne de dates en datetime et la définit comme index.
@@ -43,13 +120,25 @@ def parse_datetime_column(df: pd.DataFrame, date_col: str) -> pd.DataFrame:
     # Vérifier si la colonne est déjà au format datetime
     if not pd.api.types.is_datetime64_any_dtype(df[date_col]):
         try:
-            # Essayer de convertir en datetime avec plusieurs formats courants
-            df[date_col] = pd.to_datetime(
-                df[date_col], 
-                format='mixed',  # Permet de détecter automatiquement le format
+            # Format deviné une seule fois sur un échantillon : analyse vectorisée.
+            # Repli sur l'inférence ligne à ligne si les formats sont mélangés.
+            raw = df[date_col]
+            fmt = guess_date_format(raw, dayfirst=True)
+            parsed = pd.to_datetime(
+                raw, 
+                format=fmt or 'mixed',
                 dayfirst=True,   # Important pour les dates au format européen (JJ/MM/AAAA)
-                errors='coerce'  # Convertit les erreurs en NaT
+                errors='coerce', # Convertit les erreurs en NaT
+                cache=True       # Dates répétées converties une seule fois
             )
+            # Valeurs hors du format deviné (échantillon non représentatif) :
+            # seules ces lignes repassent par l'inférence ligne à ligne
+            missed = parsed.isna() & raw.notna()
+            if fmt and missed.any():
+                parsed[missed] = pd.to_datetime(
+                    raw[missed], format='mixed', dayfirst=True, errors='coerce', cache=True
+                )
+            df[date_col] = parsed
             
             # Vérifier si la conversion a réussi
             if df[date_col].isna().all():
@@ -104,7 +193,7 @@ def aggregate_time_series(
     
     # S'assurer que la colonne de date est au format datetime
     if not pd.api.types.is_datetime64_any_dtype(df_agg[date_col]):
-        df_agg[date_col] = pd.to_datetime(df_agg[date_col], errors='coerce')
+        df_agg[date_col] = to_datetime_fast(df_agg[date_col])
     
     # Grouper par période
     if freq.lower() == "jour":
@@ -167,13 +256,15 @@ def aggregate_time_series(
                 df_agg[date_col] = pd.to_datetime(
                     df_agg['_year'].astype(str) + '-' + 
                     df_agg['_month'].astype(str).str.zfill(2) + '-' + 
-                    df_agg['_day'].astype(str).str.zfill(2)
+                    df_agg['_day'].astype(str).str.zfill(2),
+                    format='%Y-%m-%d'
                 )
                 df_agg = df_agg.drop(columns=['_year', '_month', '_day'])
             elif freq.lower() == "mois":
                 df_agg[date_col] = pd.to_datetime(
                     df_agg['_year'].astype(str) + '-' + 
-                    df_agg['_month'].astype(str).str.zfill(2) + '-01'
+                    df_agg['_month'].astype(str).str.zfill(2) + '-01',
+                    format='%Y-%m-%d'
                 )
                 df_agg = df_agg.drop(columns=['_year', '_month'])
             
@@ -272,7 +363,7 @@ class DataPreprocessor:
             return df
         
         new_df = df.copy()
-        new_df[self.date_col] = pd.to_datetime(new_df[self.date_col], errors="coerce")
+        new_df[self.date_col] = to_datetime_fast(new_df[self.date_col])
 
         if freq == "Jour":
             new_df["_dt_group"] = new_df[self.date_col].dt.date
@@ -327,22 +418,23 @@ def add_rolling_features(
     if date_col not in df.columns:
         return df
 
-    new_df = df.sort_values(date_col).copy()
+    new_df = df.sort_values(date_col)
 
     if value_cols is None:
         value_cols = new_df.select_dtypes(include=["number"]).columns.tolist()
 
     # Vectorisation : créer toutes les colonnes rolling en une seule passe
     valid_cols = [col for col in value_cols if col in new_df.columns]
+    pieces = []
+    rolled_by_window = _rolling_many(new_df[valid_cols], windows, "mean")
     for w in windows:
-        # Appliquer rolling sur toutes les colonnes en une fois
-        rolled = new_df[valid_cols].rolling(window=w, min_periods=1).mean()
+        rolled = rolled_by_window[w]
         # Renommer les colonnes
         rolled.columns = [f"{col}_roll_{w}" for col in valid_cols]
-        # Ajouter au DataFrame
-        new_df = pd.concat([new_df, rolled], axis=1)
+        pieces.append(rolled)
 
-    return new_df
+    # Une seule concaténation pour toutes les fenêtres
+    return pd.concat([new_df, *pieces], axis=1)
 
 
 def detect_zscore_anomalies(
@@ -388,20 +480,20 @@ def add_cumulative_features(
     
     Utile pour : précipitations cumulées, degrés-jours cumulés, etc.
     """
-    df_out = df.copy()
-    df_out = df_out.sort_values(date_col)
+    df_out = df.sort_values(date_col)
     
     # Vectorisation : traiter toutes les colonnes en une passe
     valid_cols = [col for col in value_cols if col in df_out.columns]
+    pieces = []
+    cumul_by_window = _rolling_many(df_out[valid_cols], windows, "sum")
     for window in windows:
-        # Appliquer rolling sum sur toutes les colonnes en une fois
-        cumul = df_out[valid_cols].rolling(window=window, min_periods=1).sum()
+        cumul = cumul_by_window[window]
         # Renommer les colonnes
         cumul.columns = [f"{col}_cumul_{window}j" for col in valid_cols]
-        # Ajouter au DataFrame
-        df_out = pd.concat([df_out, cumul], axis=1)
+        pieces.append(cumul)
     
-    return df_out
+    # Une seule concaténation pour toutes les fenêtres
+    return pd.concat([df_out, *pieces], axis=1)
 
 
 def add_threshold_exceedance_features(
@@ -416,21 +508,27 @@ def add_threshold_exceedance_features(
     Exemple : nombre de jours > 35°C sur les 30 derniers jours.
     thresholds = {"temperature": 35.0, "precipitation": 50.0}
     """
-    df_out = df.copy()
-    df_out = df_out.sort_values(date_col)
+    df_out = df.sort_values(date_col)
     
-    for col in value_cols:
-        if col not in df_out.columns or col not in thresholds:
-            continue
-        threshold = thresholds[col]
-        exceed = (df_out[col] > threshold).astype(int)
-        
-        for window in windows:
-            df_out[f"{col}_days_above_{threshold}_{window}j"] = (
-                exceed.rolling(window=window, min_periods=1).sum()
-            )
+    valid_cols = [col for col in value_cols if col in df_out.columns and col in thresholds]
+    if not valid_cols:
+        return df_out
+
+    # Indicatrices de dépassement pour toutes les colonnes, puis une passe par fenêtre
+    exceed = pd.DataFrame(
+        {col: (df_out[col] > thresholds[col]).astype(float) for col in valid_cols},
+        index=df_out.index,
+    )
+    counts = _rolling_many(exceed, windows, "sum")
+
+    new_cols = {
+        f"{col}_days_above_{thresholds[col]}_{window}j": counts[window][col]
+        for col in valid_cols
+        for window in windows
+    }
     
-    return df_out
+    # Une seule concaténation plutôt qu'une insertion de colonne par fenêtre
+    return pd.concat([df_out, pd.DataFrame(new_cols, index=df_out.index)], axis=1)
 
 
 def add_reference_anomaly_features(
@@ -465,7 +563,7 @@ def add_reference_anomaly_features(
     
     # S'assurer que la colonne de date est au format datetime
     if not pd.api.types.is_datetime64_any_dtype(df_out[date_col]):
-        df_out[date_col] = pd.to_datetime(df_out[date_col], errors='coerce')
+        df_out[date_col] = to_datetime_fast(df_out[date_col])
     
     # Vérifier s'il y a des dates valides
     if df_out[date_col].isna().all():
@@ -498,23 +596,19 @@ def add_reference_anomaly_features(
         
         df_ref = df_out[ref_mask]
         
-        # Calculer les moyennes mensuelles de référence
-        for col in value_cols:
-            if col not in df_out.columns:
-                continue
-            
-            # Calculer la moyenne mensuelle de référence
-            monthly_ref = df_ref.groupby("_month")[col].mean().to_dict()
-            
-            # Calculer l'anomalie pour chaque ligne
-            df_out[f"{col}_anomaly_vs_ref"] = df_out.apply(
-                lambda row: row[col] - monthly_ref.get(row["_month"], np.nan)
-                if pd.notna(row[col]) and row["_month"] in monthly_ref
-                else np.nan,
-                axis=1,
-            )
+        # Moyennes mensuelles de référence pour toutes les colonnes en un seul groupby
+        valid_cols = [col for col in value_cols if col in df_out.columns]
+        monthly_ref = df_ref.groupby("_month")[valid_cols].mean()
         
-        return df_out.drop(columns=["_month"], errors='ignore')
+        # Anomalie = valeur - moyenne de référence du mois (NaN si mois absent de la référence)
+        ref_by_row = monthly_ref.reindex(df_out["_month"].to_numpy())
+        anomalies = pd.DataFrame(
+            df_out[valid_cols].to_numpy() - ref_by_row.to_numpy(),
+            index=df_out.index,
+            columns=[f"{col}_anomaly_vs_ref" for col in valid_cols],
+        )
+        
+        return pd.concat([df_out.drop(columns=["_month"]), anomalies], axis=1)
         
     except Exception as e:
         import streamlit as st
@@ -532,24 +626,24 @@ def add_extreme_features(
     
     Utile pour identifier les extrêmes récents.
     """
-    df_out = df.copy()
-    df_out = df_out.sort_values(date_col)
+    df_out = df.sort_values(date_col)
     
     # Vectorisation : traiter toutes les colonnes en une passe
     valid_cols = [col for col in value_cols if col in df_out.columns]
+    pieces = []
+    max_by_window = _rolling_many(df_out[valid_cols], windows, "max")
+    min_by_window = _rolling_many(df_out[valid_cols], windows, "min")
     for window in windows:
-        # Appliquer rolling max/min sur toutes les colonnes en une fois
-        max_vals = df_out[valid_cols].rolling(window=window, min_periods=1).max()
-        min_vals = df_out[valid_cols].rolling(window=window, min_periods=1).min()
+        max_vals = max_by_window[window]
+        min_vals = min_by_window[window]
         
         # Renommer les colonnes
         max_vals.columns = [f"{col}_max_{window}j" for col in valid_cols]
         min_vals.columns = [f"{col}_min_{window}j" for col in valid_cols]
-        
-        # Ajouter au DataFrame
-        df_out = pd.concat([df_out, max_vals, min_vals], axis=1)
+        pieces.extend([max_vals, min_vals])
     
-    return df_out
+    # Une seule concaténation pour toutes les fenêtres
+    return pd.concat([df_out, *pieces], axis=1)
 
 
 def basic_climate_preprocessing(
@@ -12,6 +12,8 @@ from datetime import datetime
 import pandas as pd
 import streamlit as st
 
+from clim_data_utils import as_dataframe
+
 
 def _get_climate_report_css() -> str:
     """CSS moderne inspiré du reporting principal."""
@@ -194,7 +196,7 @@ def show_reporting_summary(session_state) -> None:
     st.subheader("📝 Synthèse du projet climat")
 
     if "clim_data" in session_state:
-        df = session_state["clim_data"]
+        df = as_dataframe(session_state["clim_data"])
         st.markdown(f"- **Données initiales** : {df.shape[0]} lignes × {df.shape[1]} colonnes")
 
     if "clim_prep_info" in session_state:
@@ -233,7 +235,7 @@ def show_reporting_summary(session_state) -> None:
 def generate_html_report(session_state) -> str | None:
     """Génère un rapport HTML climat structuré (cadrage, données, prétraitement, modèle, limites)."""
 
-    df = session_state.get("clim_data")
+    df = as_dataframe(session_state.get("clim_data"))
     df_prep = session_state.get("clim_data_prep")
     prep_info = session_state.get("clim_prep_info", {})
     model_info = session_state.get("clim_model_info", {})
@@ -14,6 +14,8 @@ from datetime import datetime
 import streamlit as st
 from typing import Dict, Any, Optional, List, Tuple
 
+from clim_data_utils import frame_fingerprint
+
 # Configuration des dossiers de sortie
 OUTPUT_DIR = "outputs/reports"
 os.makedirs(OUTPUT_DIR, exist_ok=True)
@@ -3128,7 +3130,21 @@ def show_reporting_ui():
     
     include_plots = st.sidebar.checkbox("Inclure les graphiques", value=True)
     
-    # Bouton de génération
+    # Clé de l'état qui alimente le rapport : empreinte des données (forme,
+    # dtypes et lignes échantillonnées, voir ``frame_fingerprint``), type de
+    # rapport et modèle. Tant qu'elle ne change pas, le HTML déjà généré
+    # (encodé une fois en octets) reste affiché entre les reruns
+    df = st.session_state['df']
+    model_info = st.session_state.get('clim_model_info', {})
+    report_key = (
+        report_type,
+        frame_fingerprint(df),
+        model_info.get('model_name'),
+        model_info.get('metric_value'),
+    )
+    cached = st.session_state.get('report_html_bytes')
+    
+    # Bouton de génération : un clic explicite régénère toujours le rapport
     if st.sidebar.button("🔄 Générer le Rapport", type="primary"):
         with st.spinner("Génération du rapport en cours..."):
             try:
@@ -3137,22 +3153,27 @@ def show_reporting_ui():
                     st.session_state, 
                     report_type=report_type.lower()
                 )
-                
-                # Afficher un aperçu du rapport
-                st.subheader("Aperçu du Rapport")
-                st.components.v1.html(html_content, height=800, scrolling=True)
-                
-                # Bouton de téléchargement
-                st.download_button(
-                    label="💾 Télécharger le Rapport HTML",
-                    data=html_content,
-                    file_name=f"rapport_climat_{datetime.now().strftime('%Y%m%d_%H%M')}.html",
-                    mime="text/html"
-                )
-                
+                cached = (report_key, html_content.encode('utf-8'))
+                st.session_state['report_html_bytes'] = cached
             except Exception as e:
                 st.error(f"Erreur lors de la génération du rapport : {str(e)}")
                 st.exception(e)
+                return
+    
+    if cached is not None and cached[0] == report_key:
+        report_bytes = cached[1]
+        
+        # Afficher un aperçu du rapport
+        st.subheader("Aperçu du Rapport")
+        st.components.v1.html(report_bytes.decode('utf-8'), height=800, scrolling=True)
+        
+        # Bouton de téléchargement (mêmes octets, pas de nouvel encodage)
+        st.download_button(
+            label="💾 Télécharger le Rapport HTML",
+            data=report_bytes,
+            file_name=f"rapport_climat_{datetime.now().strftime('%Y%m%d_%H%M')}.html",
+            mime="text/html"
+        )
     else:
         # Afficher uniquement les informations de base sur les données
         col1, col2 = st.columns(2)
@@ -61,14 +61,9 @@ class RiskVisualizer:
         if not all(col in gdf.columns for col in [lat_col, lon_col, value_col]):
             raise ValueError("Les colonnes de latitude, longitude et valeur sont requises.")
         
-        # Créer une copie pour éviter les modifications sur l'original
-        df = gdf.copy()
-        
-        # Si c'est un GeoDataFrame, extraire les coordonnées si nécessaire
-        if isinstance(df, gpd.GeoDataFrame):
-            if lat_col not in df.columns or lon_col not in df.columns:
-                df[lon_col] = df.geometry.x
-                df[lat_col] = df.geometry.y
+        # Colonnes vérifiées ci-dessus : rien à ajouter, donc rien à copier
+        # (plotly ne fait que lire le DataFrame)
+        df = gdf
         
         # Créer la carte de chaleur
         fig = px.density_mapbox(
@@ -134,14 +129,9 @@ class RiskVisualizer:
             missing = [col for col in required_cols if col not in gdf.columns]
             raise ValueError(f"Colonnes manquantes: {', '.join(missing)}")
         
-        # Créer une copie pour éviter les modifications sur l'original
-        df = gdf.copy()
-        
-        # Si c'est un GeoDataFrame, extraire les coordonnées si nécessaire
-        if isinstance(df, gpd.GeoDataFrame):
-            if lat_col not in df.columns or lon_col not in df.columns:
-                df[lon_col] = df.geometry.x
-                df[lat_col] = df.geometry.y
+        # Colonnes vérifiées ci-dessus : rien à ajouter, donc rien à copier
+        # (plotly ne fait que lire le DataFrame)
+        df = gdf
         
         # Créer une figure avec deux sous-graphiques
         fig = make_subplots(
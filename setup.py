@@ -22,8 +22,11 @@ setup(
     install_requires=[
         'pandas>=1.3.0',
         'numpy>=1.20.0',
+        'pyarrow>=7.0.0',
         'scikit-learn>=1.0.0',
-        'streamlit>=1.10.0',
+        'joblib>=1.4.0',
+        'threadpoolctl>=3.0.0',
+        'streamlit>=1.37.0',
         'matplotlib>=3.4.0',
         'seaborn>=0.11.0',
         'pydeck>=0.8.0',